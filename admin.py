@@ -1,8 +1,14 @@
+from functools import partial
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from backend.db import feedbacks, global_issues, db
+from backend.db import feedbacks, batches, global_issues, issue_reporters, issue_districts, feedback_rollups, db
 from backend.auth import authenticate_user, create_user, users_collection
+from backend.reporters import reporters_page
+from backend.rollups import summarize
+from backend.admin_queries import PAGE_SIZE, feedback_query, feedback_page, top_issues
+from backend.export import EXPORT_FORMATS, export_filename, export_bytes, require_pyarrow
+from backend.dashboard_cache import DashboardCache
+from backend.reference_data import DISTRICTS
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="Admin Dashboard", page_icon="🔒", layout="wide")
@@ -16,6 +22,15 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# ---------------- SHARED QUERY CACHE ----------------
+# One per process: every officer session reads through it; batch completions invalidate it
+@st.cache_resource
+def dashboard_cache():
+    return DashboardCache().start_watcher(batches)
+
+cache = dashboard_cache()
+STATEWIDE = DashboardCache.scope_key(None, None, None)
+
 # ---------------- SESSION STATE ----------------
 if "authenticated" not in st.session_state:
     st.session_state["authenticated"] = False
@@ -83,8 +98,7 @@ if role == "super_admin":
             new_email = st.text_input("Email ID", key="new_email_input")
             
             # 1. District Selection
-            all_locs = feedbacks.distinct("location.district")
-            all_districts = sorted([d for d in all_locs if d])
+            all_districts = list(DISTRICTS)
             selected_access = st.multiselect("Assign Districts", all_districts, key="new_access_input")
 
             # 2. Role/Department Selection (NEW)
@@ -136,8 +150,7 @@ if role == "super_admin":
                         st.write("#### ✏️ Update Access")
                         
                         # District Selector (Pre-filled with current access)
-                        all_locs = feedbacks.distinct("location.district")
-                        all_districts = sorted([d for d in all_locs if d])
+                        all_districts = list(DISTRICTS)
                         
                         new_districts = st.multiselect(
                             "Update Districts", 
@@ -182,25 +195,19 @@ st.markdown("---")
 # =====================================================
 # 🌍 DATA FILTERING LOGIC
 # =====================================================
-raw_data = list(feedbacks.find().sort("created_at", -1))
+# Filters are pushed down to Mongo; nothing outside the user's scope is loaded
+# 1. Districts (super admin: statewide)
+scope_districts = None if role == "super_admin" else access_districts
 
-# 1. Filter by District
-if role == "super_admin":
-    all_data = raw_data
-else:
-    all_data = [d for d in raw_data if d.get("location", {}).get("district") in access_districts]
+# 2. Department Role: a "Water" officer only sees Water issues
+scope_category = None if role == "super_admin" or user_category == "All Categories" else user_category
 
-# 2. Filter by Department Role (NEW)
-# If user is "Water", only show Water issues.
-if role != "super_admin" and user_category != "All Categories":
-    all_data = [d for d in all_data if d.get("ai", {}).get("category") == user_category]
-
-# Analyzed vs Pending
-analyzed_feedbacks = [fb for fb in all_data if fb.get("ai")]
-
-total_received = len(all_data)
-total_analyzed = len(analyzed_feedbacks)
-pending_count = total_received - total_analyzed
+# Counters come from the rollups (O(keys)), shared by every officer with this scope
+scope = DashboardCache.scope_key(role, scope_districts, scope_category)
+summary = cache.get("summary", scope, lambda: summarize(feedback_rollups, districts=scope_districts, category=scope_category))
+total_received = summary["total"]
+total_analyzed = summary["analyzed"]
+pending_count = summary["pending"]
 
 # =====================================================
 # DASHBOARD UI (UNCHANGED)
@@ -214,26 +221,22 @@ with col2:
 with col3:
     st.metric(label="⏳ Pending", value=pending_count)
 
+if summary["by_category"]:
+    st.bar_chart(pd.Series(summary["by_category"], name="Reports").sort_values(ascending=False))
+
 st.markdown("---")
 
 st.subheader("🔥 Top Critical Issues (AI Merged)")
 
-all_issues = list(global_issues.find())
-filtered_issues = []
-
-# Filter Global Issues visually based on access
-relevant_keys = set([f"{fb['ai']['category']}_{fb['ai']['main_issue']}".replace(" ", "_").lower() for fb in analyzed_feedbacks])
-
-for issue in all_issues:
-    if issue["issue_key"] in relevant_keys:
-        filtered_issues.append(issue)
+# Top-K global issues of the user's scope, ranked by Mongo on the scope's report counts
+filtered_issues = cache.get(
+    "top_issues", scope,
+    lambda: top_issues(global_issues, issue_districts, districts=scope_districts, category=scope_category)
+)
 
 if not filtered_issues:
     st.info("✅ No critical issues found in your jurisdiction.")
 else:
-    priority_map = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
-    filtered_issues.sort(key=lambda x: (priority_map.get(x.get("priority", "LOW"), 1), x.get("total_reports", 0)), reverse=True)
-
     for issue in filtered_issues:
         name = issue.get("issue_text", "Unknown")
         count = issue.get("total_reports", 0)
@@ -244,9 +247,22 @@ else:
             with c1:
                 icon = "🚨" if prio == "CRITICAL" else "🟠" if prio == "HIGH" else "🔵"
                 st.markdown(f"### {icon} {name}")
+                location = ", ".join([p for p in [issue.get("constituency"), issue.get("district")] if p])
+                if location or issue.get("keywords"):
+                    st.caption(f"📍 {location or 'Statewide'}  ·  🔑 {', '.join(issue.get('keywords', []))}")
                 users = issue.get("users", [])
                 user_names = ", ".join([u.get('name', 'Unknown') for u in users[-3:]])
                 st.caption(f"Affected Users: {user_names} ...")
+                with st.expander("👥 All Reporters"):
+                    # Reporters live in buckets outside the issue; page through them newest first
+                    pages_key = f"reporter_pages_{issue['issue_key']}"
+                    pages = st.session_state.setdefault(pages_key, [reporters_page(issue_reporters, issue["issue_key"])])
+                    shown = [r for page, _ in pages for r in page]
+                    st.caption(", ".join(f"{r.get('name', 'Unknown')} (Booth {r.get('booth', '?')})" for r in shown) or "No reporters recorded.")
+                    cursor = pages[-1][1]
+                    if cursor is not None and st.button("Load more", key=f"more_{issue['issue_key']}"):
+                        pages.append(reporters_page(issue_reporters, issue["issue_key"], before=cursor))
+                        st.rerun()
             with c2:
                 st.metric("Reports", count)
                 st.caption(f"Priority: {prio}")
@@ -256,11 +272,49 @@ st.markdown("---")
 if st.checkbox("📂 Click to Show Detailed Data & Download"):
     st.subheader("📋 District-wise Feedback Data")
 
-    if not analyzed_feedbacks:
+    # --- Filters (applied by Mongo) ---
+    districts = sorted(d for d in scope_districts if d) if scope_districts is not None else list(DISTRICTS)
+    col_f1, col_f2, col_f3 = st.columns([2, 2, 2])
+    with col_f1:
+        selected_district = st.selectbox("Filter by District:", ["All Districts"] + districts)
+    with col_f2:
+        if scope_category:
+            selected_category = scope_category
+            st.selectbox("Department:", [scope_category], disabled=True)
+        else:
+            categories = cache.get(
+                "categories", STATEWIDE, lambda: sorted(c for c in feedback_rollups.distinct("category") if c)
+            )
+            selected_category = st.selectbox("Filter by Category:", ["All Categories"] + categories)
+    with col_f3:
+        date_range = st.date_input("Date Range:", value=())
+
+    page_districts = [selected_district] if selected_district != "All Districts" else scope_districts
+    page_category = None if selected_category == "All Categories" else selected_category
+    query = feedback_query(
+        districts=page_districts,
+        category=page_category,
+        start=date_range[0] if len(date_range) > 0 else None,
+        end=date_range[1] if len(date_range) > 1 else None,
+        analyzed=True
+    )
+
+    # --- Keyset Pages (cursor stack per filter, reset when filters change) ---
+    filter_key = repr(query)
+    if st.session_state.get("feedback_filter") != filter_key:
+        st.session_state["feedback_filter"] = filter_key
+        st.session_state["feedback_cursors"] = [None]
+    cursors = st.session_state["feedback_cursors"]
+    page_docs, next_cursor = cache.get(
+        "feedback_page", DashboardCache.scope_key(role, page_districts, page_category),
+        lambda: feedback_page(feedbacks, query, after=cursors[-1]), args=(filter_key, cursors[-1])
+    )
+
+    if not page_docs:
         st.warning("No verified data available yet.")
     else:
         rows = []
-        for fb in analyzed_feedbacks:
+        for fb in page_docs:
             user = fb.get("user", {})
             location = fb.get("location", {})
             ai = fb.get("ai", {})
@@ -275,47 +329,49 @@ if st.checkbox("📂 Click to Show Detailed Data & Download"):
                 "Date": fb.get("created_at", "")
             })
 
-        df = pd.DataFrame(rows)
-
-        col_f1, col_f2 = st.columns([3, 1])
-        with col_f1:
-            districts = sorted(df["District"].unique().tolist())
-            selected_district = st.selectbox("Filter by District:", ["All Districts"] + districts)
-
-        if selected_district != "All Districts":
-            filtered_df = df[df["District"] == selected_district]
-        else:
-            filtered_df = df
-
-        def convert_df_to_excel(dataframe):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                dataframe.to_excel(writer, index=False, sheet_name="Feedbacks")
-            return output.getvalue()
-        
-        excel_data = convert_df_to_excel(filtered_df)
-
-        with col_f2:
-            st.write("")
+        page_df = pd.DataFrame(rows)
+
+        col_p1, col_p2, col_p3 = st.columns([1, 2, 1])
+        with col_p1:
+            if st.button("⬅️ Newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col_p2:
+            first = (len(cursors) - 1) * PAGE_SIZE + 1
+            st.caption(f"Showing {first}–{first + len(page_docs) - 1}")
+        with col_p3:
+            if st.button("Older ➡️", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
+
+        # --- Export (deferred: built from Mongo only when the button is clicked, not on every rerun) ---
+        col_e1, col_e2 = st.columns([1, 2])
+        with col_e1:
+            export_format = st.selectbox("Export Format:", list(EXPORT_FORMATS), index=1)
+        with col_e2:
             st.write("")
-            st.download_button(
-                label="⬇️ Download Excel",
-                data=excel_data,
-                file_name=f"report.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+            try:
+                if export_format == "parquet":
+                    require_pyarrow()
+            except ImportError as e:
+                st.error(str(e))
+            else:
+                st.download_button(
+                    label=f"⬇️ Download {export_format.upper()}",
+                    data=partial(export_bytes, feedbacks, query, export_format),
+                    file_name=export_filename(export_format),
+                    mime=EXPORT_FORMATS[export_format][1],
+                    on_click="ignore",
+                    use_container_width=True
+                )
+
+        st.dataframe(page_df, use_container_width=True, hide_index=True)
 
-        st.dataframe(filtered_df, use_container_width=True, hide_index=True)
-        
         st.write("### 🗂️ Individual Feedback Analysis")
-        for fb in analyzed_feedbacks:
-            if selected_district != "All Districts" and fb.get("location", {}).get("district") != selected_district:
-                continue
-                
+        for fb in page_docs:
             ai = fb.get("ai", {})
             p_emoji = "🔴" if ai.get("priority") == "CRITICAL" else "🟠" if ai.get("priority") == "HIGH" else "🔵"
-            
+
             with st.expander(f"{p_emoji} {fb.get('location', {}).get('district')} - {ai.get('main_issue', 'Issue')}"):
                 c1, c2 = st.columns(2)
                 with c1:
@@ -323,4 +379,4 @@ if st.checkbox("📂 Click to Show Detailed Data & Download"):
                     st.info(fb.get("feedback", {}).get("original_text"))
                 with c2:
                     st.success(f"**Issue:** {ai.get('main_issue')}")
-                    st.write(f"**Summary:** {ai.get('summary')}")
\ No newline at end of file
+                    st.write(f"**Summary:** {ai.get('summary')}")
@@ -1,22 +1,13 @@
 import streamlit as st
-import json
-import os
 from backend.feedback_service import process_feedback
+from backend.reference_data import DISTRICTS, constituencies_of
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="Feedback Portal", layout="centered")
 st.title("📝 Feedback Portal")
 
-# ---------------- LOAD TN DATA ----------------
-@st.cache_data
-def load_tn_data():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, "TN_Assembly_Constituencies_FULL.json")
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-TN_DATA = load_tn_data()
-districts = sorted(TN_DATA.keys())
+# ---------------- TN DATA (precompiled reference data) ----------------
+districts = DISTRICTS
 
 # ---------------- LOCATION (OUTSIDE FORM - IMPORTANT) ----------------
 
@@ -29,10 +20,7 @@ district = st.selectbox(
     placeholder="Select District"
 )
 
-if district:
-    constituency_list = [c["en"] for c in TN_DATA[district]["constituencies"]]
-else:
-    constituency_list = []
+constituency_list = constituencies_of(district) if district else ()
 
 constituency = st.selectbox(
     "Assembly Constituency *",
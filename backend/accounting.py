@@ -0,0 +1,46 @@
+import os
+
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Tokens kept per counter document: a retry must come back within this many
+# later writes to the same counter to be recognised (worker leases are short)
+APPLIED_TOKENS = int(os.getenv("APPLIED_TOKENS", "64"))
+
+DUPLICATE_KEY = 11000
+
+
+# --------------------------------------------------
+# Idempotent Counter Writes
+# --------------------------------------------------
+# A chunk of analyzed feedbacks is counted under a token, recorded on every
+# counter document it increments. Retrying the chunk with the same token
+# skips the counters already holding it, so a crash or a transient error
+# between the writes of a chunk never counts a feedback twice or not at all.
+
+def guard(query, update, token):
+    """
+    (query, update) applying `update` once per token. On an upsert, a counter
+    that already holds the token makes the insert collide with its unique
+    index: run the ops through bulk_write_guarded().
+    """
+    if token is None:
+        return query, update
+    update = dict(update)
+    update["$push"] = {
+        **update.get("$push", {}),
+        "applied": {"$each": [token], "$slice": -APPLIED_TOKENS}
+    }
+    return {**query, "applied": {"$ne": token}}, update
+
+def bulk_write_guarded(collection, ops):
+    """Unordered bulk_write; duplicate-key errors of guarded upserts mean "already applied"."""
+    if not ops:
+        return
+    try:
+        collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+            raise
@@ -0,0 +1,115 @@
+from datetime import datetime, time, timezone
+
+from pymongo import DESCENDING
+
+from backend.priority import priority_fields
+
+# --------------------------------------------------
+# Admin Dashboard Queries
+# --------------------------------------------------
+# Filters run in Mongo (on the feedbacks indexes) and pages are keyset
+# paginated on (created_at, _id), so a page costs the page size whatever
+# the size of the collection or the user's jurisdiction. Statewide top
+# issues are read the same way, a limit over an index already in rank
+# order; a jurisdiction's are ranked on its own per-district counters.
+
+PAGE_SIZE = 50
+TOP_ISSUES = 10
+PAGE_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# What the feedback table and cards show; skips near-dup and batch bookkeeping
+FEEDBACK_LIST_PROJECTION = {
+    "user.name": 1,
+    "location": 1,
+    "feedback.original_text": 1,
+    "ai.category": 1,
+    "ai.priority": 1,
+    "ai.main_issue": 1,
+    "ai.summary": 1,
+    "created_at": 1
+}
+
+
+def day_bounds(start=None, end=None):
+    """Dates (inclusive, UTC) -> created_at range filter, or None for no bound."""
+    bounds = {}
+    if start:
+        bounds["$gte"] = datetime.combine(start, time.min, tzinfo=timezone.utc)
+    if end:
+        bounds["$lte"] = datetime.combine(end, time.max, tzinfo=timezone.utc)
+    return bounds or None
+
+def feedback_query(districts=None, category=None, start=None, end=None, analyzed=None):
+    """
+    Filter for a user's scope. `districts` None means statewide; `category`
+    None means every department; `analyzed` None includes pending feedbacks.
+    """
+    query = {}
+    if districts is not None:
+        query["location.district"] = {"$in": list(districts)}
+    if category is not None:
+        query["ai.category"] = category
+    elif analyzed is not None:
+        query["ai"] = {"$exists": analyzed}
+    created = day_bounds(start, end)
+    if created:
+        query["created_at"] = created
+    return query
+
+def page_cursor(doc):
+    """Keyset position just after `doc`."""
+    return doc["created_at"], doc["_id"]
+
+def top_issues(global_issues, issue_districts, districts=None, category=None, limit=TOP_ISSUES):
+    """
+    The scope's highest-priority, most reported issues. Statewide, the global
+    issues are read in index order; for some districts, the issues are ranked
+    on the reports from those districts, which replace total_reports and
+    priority on the returned documents.
+    """
+    if districts is None:
+        return list(
+            global_issues.find({"category": category} if category is not None else {}, {"batches": 0})
+            .sort([("priority_rank", DESCENDING), ("total_reports", DESCENDING)])
+            .limit(limit)
+        )
+
+    match = {"district": {"$in": list(districts)}}
+    if category is not None:
+        match["category"] = category
+    # Priority only grows with the count, so ranking on the count alone is the same order
+    ranked = list(issue_districts.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$issue_key", "total_reports": {"$sum": "$total_reports"}}},
+        {"$match": {"total_reports": {"$gt": 0}}},
+        {"$sort": {"total_reports": DESCENDING, "_id": 1}},
+        {"$limit": limit}
+    ]))
+    issues = {
+        issue["issue_key"]: issue
+        for issue in global_issues.find({"issue_key": {"$in": [row["_id"] for row in ranked]}}, {"batches": 0})
+    }
+    return [
+        dict(issues[row["_id"]], total_reports=row["total_reports"], **priority_fields(row["total_reports"]))
+        for row in ranked if row["_id"] in issues
+    ]
+
+def feedback_page(collection, query, after=None, limit=PAGE_SIZE, projection=None):
+    """
+    One page, newest first, starting after the `after` cursor. Returns
+    (docs, cursor of the next page); the cursor is None on the last page.
+    """
+    if after is not None:
+        created_at, _id = after
+        query = {"$and": [query, {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": _id}}
+        ]}]}
+
+    # One extra document tells whether another page follows
+    docs = list(
+        collection.find(query, projection or FEEDBACK_LIST_PROJECTION).sort(PAGE_SORT).limit(limit + 1)
+    )
+    if len(docs) > limit:
+        return docs[:limit], page_cursor(docs[limit - 1])
+    return docs, None
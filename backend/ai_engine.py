@@ -1,4 +1,12 @@
+import os
 import re
+import json
+from itertools import islice
+
+from backend.keyword_matcher import KeywordMatcher
+
+# Bump whenever keyword tables or rules change: cached analyses are keyed by it
+ENGINE_VERSION = "keyword-2"
 
 # =========================
 # 1. LANGUAGE DETECTION
@@ -10,47 +18,72 @@ TAMIL_KEYWORDS = [
 ]
 
 def detect_language(text):
-    text_lower = text.lower()
-    tamil_count = 0
-    for word in TAMIL_KEYWORDS:
-        if word in text_lower:
-            tamil_count += 1
-    return "ta" if tamil_count >= 1 else "en"
+    return match_keywords(text)["language"]
 
 
 # =========================
 # 2. OFFLINE TRANSLATION
 # =========================
-TAMIL_TO_ENGLISH = {
-    "thanni": "water", "varala": "not coming", "varudhu": "is coming",
-    "romba": "very", "kastam": "difficult", "iruku": "is", "illa": "no",
-    "kuppai": "garbage", "sutham": "cleanliness", "mosam": "bad",
-    "road": "road", "current": "power", "cut": "cut", "velai": "work",
-    "office": "office", "neraya": "a lot", "konjam": "little",
-    "problem": "problem", "seri": "okay", "worst": "worst",
-    "danger": "danger", "school": "school", "hospital": "hospital"
-}
+# Phrase and word dictionaries (romanized Tanglish + Tamil script) live in
+# backend/data/translations.json so they can grow without code changes.
+TRANSLATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "translations.json")
 
-COMMON_PHRASES = {
-    "thanni varala": "water is not coming",
-    "romba kastama iruku": "it is very difficult",
-    "sutham illa": "there is no cleanliness",
-    "current cut": "power cut",
-    "velai illa": "no work"
-}
+def load_translations(path=TRANSLATIONS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+TRANSLATIONS = load_translations()
+TAMIL_TO_ENGLISH = TRANSLATIONS["words"]
+COMMON_PHRASES = TRANSLATIONS["phrases"]
+
+# Keeps letters, digits and the whole Tamil block (vowel signs and pulli
+# are not \w, so a plain [^\w\s] would tear Tamil words apart)
+PUNCTUATION = re.compile(r"[^\w\s\u0B80-\u0BFF]")
+TAMIL_SCRIPT = re.compile(r"[\u0B80-\u0BFF]")
+
+_PHRASE_END = ""
+
+def build_phrase_trie(words, phrases):
+    """Token-level trie: each edge is one word, _PHRASE_END marks a translation."""
+    trie = {}
+    for source, meaning in list(words.items()) + list(phrases.items()):
+        node = trie
+        for token in source.lower().split():
+            node = node.setdefault(token, {})
+        node[_PHRASE_END] = meaning
+    return trie
+
+PHRASE_TRIE = build_phrase_trie(TAMIL_TO_ENGLISH, COMMON_PHRASES)
+
+def tokenize(text):
+    tokens = (PUNCTUATION.sub("", word) for word in text.lower().split())
+    return [t for t in tokens if t]
 
 def translate_to_english(text):
-    text_lower = text.lower()
-    for phrase, meaning in COMMON_PHRASES.items():
-        text_lower = text_lower.replace(phrase, meaning)
-    
-    words = text_lower.split()
+    """
+    One left-to-right pass: at each token take the longest phrase (or word)
+    in PHRASE_TRIE, otherwise keep the token as it is.
+    """
+    tokens = tokenize(text)
     translated_words = []
-    for word in words:
-        clean_word = re.sub(r"[^\w\s]", "", word)
-        translated_word = TAMIL_TO_ENGLISH.get(clean_word, clean_word)
-        translated_words.append(translated_word)
-    
+    i = 0
+    while i < len(tokens):
+        node = PHRASE_TRIE
+        match, match_end = None, i
+        j = i
+        while j < len(tokens) and tokens[j] in node:
+            node = node[tokens[j]]
+            j += 1
+            if _PHRASE_END in node:
+                match, match_end = node[_PHRASE_END], j
+
+        if match is None:
+            translated_words.append(tokens[i])
+            i += 1
+        else:
+            translated_words.append(match)
+            i = match_end
+
     return " ".join(translated_words).capitalize()
 
 
@@ -70,14 +103,7 @@ CATEGORY_KEYWORDS = {
 }
 
 def detect_category(text):
-    text_lower = text.lower()
-    scores = {}
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = sum(1 for word in keywords if word in text_lower)
-        scores[category] = score
-    
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "Other"
+    return match_keywords(text)["category"]
 
 
 # =========================
@@ -86,13 +112,56 @@ def detect_category(text):
 HIGH_PRIORITY_WORDS = ["urgent", "danger", "accident", "risk", "critical", "worst", "life threat"]
 MEDIUM_PRIORITY_WORDS = ["problem", "issue", "bad", "delay", "ignored", "kastam"]
 
+DURATION_PATTERN = re.compile(r"\b\d+\s*(day|days|week|weeks)\b")
+
 def detect_priority(text):
-    text_lower = text.lower()
-    if re.search(r"\b\d+\s*(day|days|week|weeks)\b", text_lower):
-        return "High"
-    if any(w in text_lower for w in HIGH_PRIORITY_WORDS): return "High"
-    if any(w in text_lower for w in MEDIUM_PRIORITY_WORDS): return "Medium"
-    return "Low"
+    return match_keywords(text)["priority"]
+
+
+# =========================
+# 4b. COMPILED KEYWORD MATCHER
+# =========================
+# Built once at import: every keyword table above goes into one automaton,
+# so language, category and priority come out of a single scan of the text.
+def build_matcher():
+    tables = {("language", "ta"): TAMIL_KEYWORDS}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        tables[("category", category)] = keywords
+    tables[("priority", "High")] = HIGH_PRIORITY_WORDS
+    tables[("priority", "Medium")] = MEDIUM_PRIORITY_WORDS
+    return KeywordMatcher(tables)
+
+MATCHER = build_matcher()
+
+def match_keywords(text):
+    """
+    One pass over `text` -> language, category scores and priority hits.
+    """
+    hits = MATCHER.scan(text)
+
+    scores = {
+        category: len(hits.get(("category", category), ()))
+        for category in CATEGORY_KEYWORDS
+    }
+    best = max(scores, key=scores.get)
+
+    high_hits = hits.get(("priority", "High"), set())
+    medium_hits = hits.get(("priority", "Medium"), set())
+    if DURATION_PATTERN.search(text.lower()) or high_hits:
+        priority = "High"
+    elif medium_hits:
+        priority = "Medium"
+    else:
+        priority = "Low"
+
+    return {
+        "language": "ta" if ("language", "ta") in hits or TAMIL_SCRIPT.search(text) else "en",
+        "category": best if scores[best] > 0 else "Other",
+        "category_scores": scores,
+        "priority": priority,
+        "high_hits": high_hits,
+        "medium_hits": medium_hits
+    }
 
 
 # =========================
@@ -121,15 +190,22 @@ def generate_summary(text):
 # =========================
 # 6. MAIN FUNCTION (CONNECTED)
 # =========================
-def analyze_feedback_batch(feedback_list):
+def analyze_feedback_batch(feedback_list, vectorized=False):
     """
     Processes a list of feedbacks and returns analysis results.
+    vectorized=True uses the matrix-based bulk analyzer (same output),
+    which is meant for backfills and very large batches.
     """
+    if vectorized:
+        from backend.bulk_analyzer import analyze_feedback_bulk
+        return analyze_feedback_bulk(feedback_list)
+
     results = []
     for text in feedback_list:
         eng_text = translate_to_english(text)
-        category = detect_category(eng_text)
-        priority = detect_priority(eng_text)
+        matched = match_keywords(eng_text)
+        category = matched["category"]
+        priority = matched["priority"]
         main_issue = extract_main_issue(category)
         summary = generate_summary(eng_text)
         
@@ -139,4 +215,25 @@ def analyze_feedback_batch(feedback_list):
             "main_issue": main_issue,
             "summary": summary
         })
-    return results
\ No newline at end of file
+    return results
+
+
+# =========================
+# 7. STREAMING API
+# =========================
+def iter_chunks(iterable, size):
+    """Yields lists of up to `size` items; works on lists, generators and cursors."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_analyze_feedback(feedback_iter, chunk_size=500, analyze_fn=analyze_feedback_batch):
+    """
+    Lazy form of analyze_feedback_batch: consumes any iterable of texts and
+    yields one result per text, holding at most `chunk_size` items at a time.
+    """
+    for chunk in iter_chunks(feedback_iter, chunk_size):
+        yield from analyze_fn(chunk)
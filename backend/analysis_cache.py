@@ -0,0 +1,173 @@
+import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Tunables (override through .env)
+CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000"))
+CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+
+def normalize_text(text):
+    return " ".join(text.lower().strip().split())
+
+
+# --------------------------------------------------
+# Two-Tier Analysis Cache
+# --------------------------------------------------
+class AnalysisCache:
+    """
+    Caches analysis results by hash(engine_version + normalized text).
+
+    Tier 1 is an in-process LRU, tier 2 an optional Mongo collection with a
+    TTL index. Bumping the engine version invalidates both tiers, because
+    old entries simply stop matching.
+    """
+
+    def __init__(self, engine_version, collection=None,
+                 max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.engine_version = engine_version
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_ready = False
+        self.counters = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "mongo_errors": 0}
+
+    def make_key(self, text):
+        raw = f"{self.engine_version}\x00{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ---------------- COUNTERS ----------------
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._lru)
+        lookups = stats["memory_hits"] + stats["mongo_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    # ---------------- TIER 1: LRU ----------------
+    def _memory_get(self, key):
+        with self._lock:
+            if key not in self._lru:
+                return None
+            self._lru.move_to_end(key)
+            return self._lru[key]
+
+    def _memory_put(self, key, result):
+        with self._lock:
+            self._lru[key] = result
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    # ---------------- TIER 2: MONGO ----------------
+    def _ensure_index(self):
+        if self._index_ready or self.collection is None:
+            return
+        self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        self._index_ready = True
+
+    def _mongo_get_many(self, keys):
+        if self.collection is None or not keys:
+            return {}
+        try:
+            docs = self.collection.find({"_id": {"$in": keys}}, {"result": 1})
+            return {d["_id"]: d["result"] for d in docs}
+        except PyMongoError as e:
+            print(f"⚠️ Analysis cache read failed: {e}")
+            self._count("mongo_errors")
+            return {}
+
+    def _mongo_put_many(self, entries):
+        if self.collection is None or not entries:
+            return
+
+        now = datetime.now(timezone.utc)
+        try:
+            self._ensure_index()
+            self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": key},
+                    {"$set": {"engine": self.engine_version, "result": result, "created_at": now}},
+                    upsert=True
+                )
+                for key, result in entries.items()
+            ], ordered=False)
+        except PyMongoError as e:
+            print(f"⚠️ Analysis cache write failed: {e}")
+            self._count("mongo_errors")
+
+    # ---------------- PUBLIC API ----------------
+    def get_many(self, texts):
+        """Returns {index: result} for every text found in either tier."""
+        found, missing = {}, {}
+        for i, text in enumerate(texts):
+            key = self.make_key(text)
+            result = self._memory_get(key)
+            if result is not None:
+                found[i] = copy.deepcopy(result)
+                self._count("memory_hits")
+            else:
+                missing.setdefault(key, []).append(i)
+
+        stored = self._mongo_get_many(list(missing))
+        for key, result in stored.items():
+            self._memory_put(key, result)
+            for i in missing[key]:
+                found[i] = copy.deepcopy(result)
+            self._count("mongo_hits", len(missing[key]))
+
+        self._count("misses", len(texts) - len(found))
+        return found
+
+    def put_many(self, texts, results):
+        entries = {}
+        for text, result in zip(texts, results):
+            key = self.make_key(text)
+            self._memory_put(key, copy.deepcopy(result))
+            entries[key] = result
+        self._mongo_put_many(entries)
+
+    def analyze_many(self, texts, analyze_fn):
+        """
+        Cache-fronted version of `analyze_fn(list_of_texts) -> list_of_results`.
+        Only cache misses (deduplicated) are sent to the engine, and they are
+        sent normalized, so a cached result never depends on which spelling
+        of the text happened to arrive first.
+        """
+        found = self.get_many(texts)
+
+        pending = {}
+        for i, text in enumerate(texts):
+            if i not in found:
+                pending.setdefault(normalize_text(text), []).append(i)
+
+        if pending:
+            miss_texts = list(pending)
+            miss_results = analyze_fn(miss_texts)
+            self.put_many(miss_texts, miss_results)
+            for idx, result in zip(pending.values(), miss_results):
+                for i in idx:
+                    found[i] = copy.deepcopy(result)
+
+        return [found[i] for i in range(len(texts))]
+
+    def analyze_one(self, text, analyze_fn):
+        """Single-text form, for engines that take one input per call."""
+        return self.analyze_many([text], lambda batch: [analyze_fn(batch[0])])[0]
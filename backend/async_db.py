@@ -0,0 +1,23 @@
+from pymongo import AsyncMongoClient
+import os
+from dotenv import load_dotenv
+
+# Load .env file
+load_dotenv()
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+
+# asyncio driver for the API server; connects lazily on the running event loop
+client = AsyncMongoClient(MONGODB_URI)
+
+db = client[os.getenv("MONGODB_DB", "feedback_ai_db")]
+
+
+# Collections (same as backend/db.py)
+feedbacks = db["feedbacks"]
+batches = db["batches"]
+batch_policies = db["batch_policies"]
+analysis_jobs = db["analysis_jobs"]
+near_duplicate_index = db["near_duplicate_index"]
+feedback_rollups = db["feedback_rollups"]
+idempotency_keys = db["idempotency_keys"]     # claimed request keys + their responses (TTL)
@@ -0,0 +1,221 @@
+import asyncio
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+from backend.async_db import (
+    feedbacks, batches, batch_policies, analysis_jobs, near_duplicate_index, feedback_rollups,
+    idempotency_keys
+)
+from backend.idempotency import (
+    IDEMPOTENCY_WAIT_SECONDS, IdempotencyConflict, claim_doc, lease_time, replay, stale_claim
+)
+from backend.batch_scheduler import ALLOCATE_RETRIES
+from backend.rollups import received_ops
+from backend.feedback_service import (
+    batch_scheduler, job_queue, near_duplicates, duplicate_scope, build_feedback_doc,
+    group_rows, spread_slots, prepare_chunk_docs, insert_errors, chunk_results,
+    ANALYZE_BATCH_JOB, batch_job_key, ensure_indexes
+)
+
+# The request path of feedback_service.py on the asyncio Mongo driver. Queries
+# and updates come from the same builders, so both paths write identical
+# documents; the sync functions stay in use by Streamlit and the workers.
+
+
+# --------------------------------------------------
+# Batch Handling
+# --------------------------------------------------
+async def get_policy(district, constituency):
+    policy_id = batch_scheduler.policy_id(district, constituency)
+    policy = batch_scheduler.cached_policy(policy_id)
+    if policy is None:
+        policy = await batch_policies.find_one({"_id": policy_id})
+        batch_scheduler.remember_policy(policy_id, policy)
+    return policy or {}
+
+async def take_slots(district, constituency, n, plan):
+    query, pipeline, new_id = batch_scheduler.slot_request(district, constituency, n, plan)
+    for attempt in range(ALLOCATE_RETRIES):
+        try:
+            before = await batches.find_one_and_update(
+                query, pipeline, upsert=True, return_document=ReturnDocument.BEFORE
+            )
+            return batch_scheduler.slot_outcome(before, n, plan, new_id)
+        except DuplicateKeyError:
+            # Another submitter opened the batch between our miss and insert
+            if attempt == ALLOCATE_RETRIES - 1:
+                raise
+
+async def allocate_slots(district, constituency, n=1):
+    plan = batch_scheduler.plan(district, constituency, policy=await get_policy(district, constituency))
+
+    allocations = []
+    while n > 0:
+        batch, taken = await take_slots(district, constituency, n, plan)
+        if taken:
+            allocations.append({**batch, "slots": taken})
+        elif batch["filled"]:
+            await enqueue_batch_analysis(batch["batch_id"])
+        n -= taken
+    return allocations
+
+async def enqueue_batch_analysis(batch_id):
+    job = {**job_queue.new_job(ANALYZE_BATCH_JOB, {"batch_id": batch_id}), "key": batch_job_key(batch_id)}
+    try:
+        await analysis_jobs.update_one({"key": job["key"]}, {"$setOnInsert": job}, upsert=True)
+    except DuplicateKeyError:
+        pass  # lost an upsert race with another producer: the job exists
+
+
+# --------------------------------------------------
+# Near-Duplicates
+# --------------------------------------------------
+async def persist_signatures(entries):
+    """Async NearDuplicateIndex.persist_many: a failed write only costs later duplicate detection."""
+    if not entries:
+        return
+    try:
+        await near_duplicate_index.bulk_write(near_duplicates.persist_ops(entries), ordered=False)
+    except PyMongoError as e:
+        print(f"⚠️ Near-duplicate index write failed: {e}")
+
+
+# --------------------------------------------------
+# Main Entry Points
+# --------------------------------------------------
+async def process_feedback(form_data, stored=None):
+    """`stored(response)` is awaited once the feedback is inserted, before the bookkeeping after it."""
+
+    # 1. Add to Batch
+    batch = (await allocate_slots(form_data["district"], form_data["constituency"], 1))[0]
+
+    # 2. Near-Duplicate Check (CPU-bound, and may refresh from Mongo: off the loop)
+    text = form_data["feedback_text"]
+    scope = duplicate_scope(form_data["district"], form_data["constituency"])
+    signature = near_duplicates.signature(text)
+    duplicate = await asyncio.to_thread(near_duplicates.query, text, scope, signature)
+
+    # 3. Save Feedback
+    feedback_doc = build_feedback_doc(form_data, batch["batch_id"], duplicate)
+    inserted = await feedbacks.insert_one(feedback_doc)
+    if batch["filled"]:
+        response = {"message": f"Batch Full ({batch['count']}/{batch['limit']}) - AI Analysis Queued!"}
+    else:
+        remaining = batch["limit"] - batch["count"]
+        response = {"message": f"Feedback stored. Waiting for {remaining} more users."}
+    if stored is not None:
+        await stored(response)
+    await feedback_rollups.bulk_write(received_ops([feedback_doc]))
+    if not duplicate:
+        near_duplicates.add(inserted.inserted_id, text, scope=scope, signature=signature, persist=False)
+        await persist_signatures([(inserted.inserted_id, scope, signature)])
+
+    # 4. Check Limit (queue AI analysis if this slot filled the batch)
+    if batch["filled"]:
+        await enqueue_batch_analysis(batch["batch_id"])
+    return response
+
+
+async def process_feedback_once(form_data, key):
+    """
+    process_feedback guarded by an idempotency key. Returns (response, replayed):
+    a repeated key gets the first request's response back, and nothing is
+    stored, counted or queued again.
+    """
+    if key is None:
+        return await process_feedback(form_data), False
+
+    claim = claim_doc(key, form_data)
+    try:
+        await idempotency_keys.insert_one(claim)
+    except DuplicateKeyError:
+        return await wait_for_replay(key, form_data)
+    return await process_claimed(form_data, key, claim["claimed_at"]), False
+
+async def process_claimed(form_data, key, claimed_at):
+    """process_feedback under a claim this request holds (lease `claimed_at`)."""
+    claim = {"_id": key, "claimed_at": claimed_at}
+
+    async def stored(response):
+        await idempotency_keys.update_one(
+            {**claim, "status": "pending"}, {"$set": {"status": "stored", "response": response}}
+        )
+
+    try:
+        response = await process_feedback(form_data, stored)
+    except BaseException:
+        # Not stored: release the key so the client's retry goes through.
+        # Stored: a retry gets the response back instead of storing a second copy
+        await idempotency_keys.delete_one({**claim, "status": "pending"})
+        await idempotency_keys.update_one({**claim, "status": "stored"}, {"$set": {"status": "done"}})
+        raise
+    await idempotency_keys.update_one({"_id": key}, {"$set": {"status": "done", "response": response}})
+    return response
+
+async def wait_for_replay(key, form_data, wait_seconds=IDEMPOTENCY_WAIT_SECONDS):
+    """
+    (response, replayed) for a key already claimed: the original's response,
+    once it finishes; a fresh one if the original failed or its lease ran out.
+    """
+    deadline = asyncio.get_running_loop().time() + wait_seconds
+    while True:
+        existing = await idempotency_keys.find_one({"_id": key})
+        if existing is None:
+            # The original failed and released the key (or it expired): claim it afresh
+            return await process_feedback_once(form_data, key)
+        response = replay(existing, form_data)
+        if response is not None:
+            return response, True
+
+        stale = stale_claim(existing)
+        if stale is not None:
+            # The original crashed without releasing its claim: renew the lease and take over
+            claimed_at = lease_time()
+            if await idempotency_keys.find_one_and_update(stale, {"$set": {"claimed_at": claimed_at}}):
+                return await process_claimed(form_data, key, claimed_at), False
+            continue   # another retry took it over first
+
+        if asyncio.get_running_loop().time() >= deadline:
+            raise IdempotencyConflict("A request with this Idempotency-Key is still being processed", 409)
+        await asyncio.sleep(0.1)
+
+
+async def process_feedback_chunk(rows):
+    """Async counterpart of feedback_service.process_feedback_chunk."""
+    # 1. Batch Slots (one allocation per group, groups concurrently)
+    groups = group_rows(rows)
+    allocations = await asyncio.gather(*(
+        allocate_slots(district, constituency, len(indexes))
+        for (district, constituency), indexes in groups.items()
+    ))
+    batch_ids, filled = [None] * len(rows), []
+    for indexes, group_allocations in zip(groups.values(), allocations):
+        filled += spread_slots(batch_ids, indexes, group_allocations)
+
+    # 2. Near-Duplicates
+    docs, new_signatures = await asyncio.to_thread(prepare_chunk_docs, rows, batch_ids)
+
+    # 3. Save Feedbacks
+    errors = {}
+    try:
+        await feedbacks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = insert_errors(e)
+    inserted = {doc["_id"] for i, doc in enumerate(docs) if i not in errors}
+    if inserted:
+        await feedback_rollups.bulk_write(received_ops(d for d in docs if d["_id"] in inserted), ordered=False)
+    new_signatures = [entry for entry in new_signatures if entry[0] in inserted]
+    await persist_signatures(new_signatures)
+
+    # 4. Queue Filled Batches (now that their feedbacks are stored)
+    await asyncio.gather(*(enqueue_batch_analysis(batch_id) for batch_id in filled))
+
+    return chunk_results(docs, errors)
+
+
+async def startup():
+    """Index bootstrap runs once on the sync driver, off the event loop."""
+    failures = await asyncio.to_thread(ensure_indexes)
+    if failures:
+        print(f"⚠️ Indexes missing on {', '.join(failures)} (see above); queries on them will scan")
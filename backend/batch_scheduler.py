@@ -0,0 +1,331 @@
+import os
+import math
+import time
+import threading
+from uuid import uuid4
+from datetime import datetime, timezone, timedelta
+
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from dotenv import load_dotenv
+
+from backend.indexes import BATCH_INDEXES
+
+load_dotenv()
+
+# Tunables (override through .env)
+BATCH_SIZE_LIMIT = int(os.getenv("BATCH_SIZE_LIMIT", "15"))           # until a rate is observed
+BATCH_MIN_LIMIT = int(os.getenv("BATCH_MIN_LIMIT", "5"))
+BATCH_MAX_LIMIT = int(os.getenv("BATCH_MAX_LIMIT", "200"))
+BATCH_MAX_AGE_SECONDS = int(os.getenv("BATCH_MAX_AGE_SECONDS", "1800"))
+BATCH_LATENCY_SLO_SECONDS = int(os.getenv("BATCH_LATENCY_SLO_SECONDS", "900"))
+
+POLICY_CACHE_SECONDS = 60  # policies only change when a batch completes
+ALLOCATE_RETRIES = 5      # concurrent first-slot upserts of one constituency
+
+EWMA_ALPHA = 0.3          # weight of the newest batch in rate / processing estimates
+MIN_COLLECT_SECONDS = 30  # never close a batch on time sooner than this
+
+
+def as_utc(value):
+    """Mongo hands back naive UTC datetimes unless the client is tz_aware."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(math.ceil(q * len(sorted_values))) - 1)]
+
+
+# --------------------------------------------------
+# Batch Flush Scheduler
+# --------------------------------------------------
+class BatchScheduler:
+    """
+    Decides when a "collecting" batch is closed for analysis: at its size
+    `limit`, or at `flush_at`, whichever comes first.
+
+    Both are set per batch from the constituency's policy (batch_policies):
+      * limit    = arrivals expected within the collect window, clamped, so
+                   busy constituencies get big batches and quiet ones small
+      * flush_at = created_at + the collect window, i.e. the latency SLO
+                   minus the observed queue + analysis time, capped by the
+                   maximum batch age
+
+    Arrival rate and processing time are EWMAs updated once per completed
+    batch, so submissions pay nothing extra. An SLO can be overridden per
+    constituency by setting `slo_seconds` on its policy document.
+    """
+
+    def __init__(self, batches, policies, size_limit=BATCH_SIZE_LIMIT, min_limit=BATCH_MIN_LIMIT,
+                 max_limit=BATCH_MAX_LIMIT, max_age_seconds=BATCH_MAX_AGE_SECONDS,
+                 slo_seconds=BATCH_LATENCY_SLO_SECONDS):
+        self.batches = batches
+        self.policies = policies
+        self.size_limit = size_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_age_seconds = max_age_seconds
+        self.slo_seconds = slo_seconds
+        self._policy_cache = {}
+        self._policy_lock = threading.Lock()
+
+    def close_duplicate_batches(self):
+        """
+        Closes all but the newest "collecting" batch of each constituency and
+        returns the closed batch_ids, which need queueing. Databases written
+        before the one_collecting_batch index can hold several, and the index
+        can't be built over them.
+        """
+        groups = self.batches.aggregate([
+            {"$match": {"status": "collecting"}},
+            {"$sort": {"created_at": DESCENDING}},
+            {"$group": {
+                "_id": {"district": "$district", "constituency": "$constituency"},
+                "batch_ids": {"$push": "$batch_id"}
+            }},
+            {"$match": {"batch_ids.1": {"$exists": True}}}
+        ])
+        return [
+            batch_id for group in groups for batch_id in group["batch_ids"][1:]
+            if self.close(batch_id, "duplicate")
+        ]
+
+    def ensure_indexes(self):
+        """
+        Bootstrap for a scheduler used on its own: closes duplicate collecting
+        batches (returned, for queueing), then builds BATCH_INDEXES. Allocation
+        doesn't need the indexes to work; without them, racing first
+        submissions of a constituency may open two batches.
+        """
+        closed = self.close_duplicate_batches()
+        self.batches.create_indexes(BATCH_INDEXES)
+        return closed
+
+    @staticmethod
+    def policy_id(district, constituency):
+        return f"{district}|{constituency}"
+
+    # ---------------- POLICY ----------------
+    def cached_policy(self, policy_id):
+        """The policy if fetched within POLICY_CACHE_SECONDS, else None."""
+        with self._policy_lock:
+            cached = self._policy_cache.get(policy_id)
+        return cached[1] if cached and cached[0] > time.monotonic() else None
+
+    def remember_policy(self, policy_id, doc):
+        with self._policy_lock:
+            self._policy_cache[policy_id] = (time.monotonic() + POLICY_CACHE_SECONDS, doc or {})
+
+    def policy(self, district, constituency):
+        policy_id = self.policy_id(district, constituency)
+        doc = self.cached_policy(policy_id)
+        if doc is not None:
+            return doc
+
+        try:
+            doc = self.policies.find_one({"_id": policy_id})
+        except PyMongoError as e:
+            print(f"⚠️ Batch policy lookup failed: {e}")
+            doc = None
+        self.remember_policy(policy_id, doc)
+        return doc or {}
+
+    def plan(self, district, constituency, now=None, policy=None):
+        """Size limit and flush deadline for a batch opened now."""
+        now = now or datetime.now(timezone.utc)
+        if policy is None:
+            policy = self.policy(district, constituency)
+
+        slo = policy.get("slo_seconds") or self.slo_seconds
+        processing = policy.get("processing_seconds") or 0.0
+        slo_window = max(MIN_COLLECT_SECONDS, slo - 2 * processing)
+        window = min(self.max_age_seconds, slo_window)
+
+        rate = policy.get("arrival_rate")
+        if rate:
+            limit = max(self.min_limit, min(self.max_limit, math.ceil(rate * window)))
+        else:
+            limit = self.size_limit
+
+        return {
+            "limit": limit,
+            "flush_at": now + timedelta(seconds=window),
+            "flush_trigger": "slo" if slo_window < self.max_age_seconds else "age",
+            "slo_seconds": slo
+        }
+
+    def record_completion(self, batch):
+        """Folds a finished batch into its constituency's rate / processing EWMAs."""
+        created = as_utc(batch["created_at"])
+        queued = as_utc(batch.get("queued_at") or batch["created_at"])
+        completed = as_utc(batch["completed_at"])
+
+        collect_seconds = max(1.0, (queued - created).total_seconds())
+        observed_rate = batch.get("count", 1) / collect_seconds
+        observed_processing = max(0.0, (completed - queued).total_seconds())
+
+        policy_id = self.policy_id(batch["district"], batch["constituency"])
+        try:
+            policy = self.policies.find_one({"_id": policy_id}) or {}
+            rate = policy.get("arrival_rate")
+            processing = policy.get("processing_seconds")
+            self.policies.update_one(
+                {"_id": policy_id},
+                {
+                    "$set": {
+                        "arrival_rate": observed_rate if rate is None
+                        else EWMA_ALPHA * observed_rate + (1 - EWMA_ALPHA) * rate,
+                        "processing_seconds": observed_processing if processing is None
+                        else EWMA_ALPHA * observed_processing + (1 - EWMA_ALPHA) * processing,
+                        "updated_at": completed
+                    },
+                    "$setOnInsert": {"district": batch["district"], "constituency": batch["constituency"]}
+                },
+                upsert=True
+            )
+        except PyMongoError as e:
+            print(f"⚠️ Batch policy update failed: {e}")
+        with self._policy_lock:
+            self._policy_cache.pop(policy_id, None)
+
+    # ---------------- ALLOCATION ----------------
+    @staticmethod
+    def slot_request(district, constituency, n, plan):
+        """
+        One atomic upsert on the constituency's collecting batch: opens it if
+        missing, takes up to `n` of its free slots, and closes it ("queued")
+        in the same write when it fills. Returns (filter, pipeline, new batch_id);
+        run it with upsert=True and ReturnDocument.BEFORE, then slot_outcome().
+        """
+        new_id, now = str(uuid4()), datetime.now(timezone.utc)
+        is_full = {"$gte": ["$count", "$limit"]}
+        pipeline = [
+            {"$set": {
+                "batch_id": {"$ifNull": ["$batch_id", new_id]},
+                "created_at": {"$ifNull": ["$created_at", now]},
+                "limit": {"$ifNull": ["$limit", plan["limit"]]},
+                "flush_at": {"$ifNull": ["$flush_at", plan["flush_at"]]},
+                "flush_trigger": {"$ifNull": ["$flush_trigger", plan["flush_trigger"]]},
+                "slo_seconds": {"$ifNull": ["$slo_seconds", plan["slo_seconds"]]},
+                "count": {"$min": [
+                    {"$ifNull": ["$limit", plan["limit"]]},
+                    {"$add": [{"$ifNull": ["$count", 0]}, n]}
+                ]}
+            }},
+            {"$set": {
+                "status": {"$cond": [is_full, "queued", "collecting"]},
+                "flush_reason": {"$cond": [is_full, "size", "$$REMOVE"]},
+                "queued_at": {"$cond": [is_full, now, "$$REMOVE"]}
+            }}
+        ]
+        return {"district": district, "constituency": constituency, "status": "collecting"}, pipeline, new_id
+
+    @staticmethod
+    def slot_outcome(before, n, plan, new_id):
+        """(batch, slots taken) from the document as it was before the upsert."""
+        if before is None:
+            # This call opened the batch
+            taken = min(n, plan["limit"])
+            batch = {"batch_id": new_id, "limit": plan["limit"], "count": taken}
+        else:
+            taken = max(0, min(n, before["limit"] - before["count"]))
+            batch = {"batch_id": before["batch_id"], "limit": before["limit"], "count": before["count"] + taken}
+        batch["filled"] = batch["count"] >= batch["limit"]
+        # (a pre-existing over-full batch is closed with 0 slots taken)
+        return batch, taken
+
+    def _take_slots(self, district, constituency, n, plan):
+        query, pipeline, new_id = self.slot_request(district, constituency, n, plan)
+        for attempt in range(ALLOCATE_RETRIES):
+            try:
+                before = self.batches.find_one_and_update(
+                    query, pipeline, upsert=True, return_document=ReturnDocument.BEFORE
+                )
+                return self.slot_outcome(before, n, plan, new_id)
+            except DuplicateKeyError:
+                # Another submitter opened the batch between our miss and insert
+                if attempt == ALLOCATE_RETRIES - 1:
+                    raise
+
+    def allocate(self, district, constituency, n=1, limit=None):
+        """
+        Reserves `n` feedback slots, rolling over into fresh batches as they
+        fill. Returns [{"batch_id", "slots", "count", "limit", "filled"}];
+        a batch with filled=True was closed by this call and needs queueing.
+        """
+        plan = self.plan(district, constituency)  # only used if this call opens the batch
+        if limit:
+            plan["limit"] = limit
+
+        allocations = []
+        while n > 0:
+            batch, taken = self._take_slots(district, constituency, n, plan)
+            if taken or batch["filled"]:
+                allocations.append({**batch, "slots": taken})
+            n -= taken
+        return allocations
+
+    # ---------------- FLUSHING ----------------
+    def close(self, batch_id, reason):
+        """collecting -> queued, exactly once however many flushers race; False if already closed."""
+        result = self.batches.update_one(
+            {"batch_id": batch_id, "status": "collecting"},
+            {"$set": {"status": "queued", "flush_reason": reason, "queued_at": datetime.now(timezone.utc)}}
+        )
+        return result.modified_count == 1
+
+    def due_batches(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        return self.batches.find(
+            {"status": "collecting", "flush_at": {"$lte": now}},
+            {"batch_id": 1, "flush_trigger": 1}
+        )
+
+    # ---------------- METRICS ----------------
+    def metrics(self, window_hours=24, limit=5000):
+        """
+        Time-to-analysis of recently completed batches: seconds from the first
+        feedback of a batch (its creation) to its analysis being stored.
+        """
+        since = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+        cursor = self.batches.find(
+            {"status": "completed", "completed_at": {"$gte": since}},
+            {"created_at": 1, "queued_at": 1, "completed_at": 1, "flush_reason": 1,
+             "district": 1, "constituency": 1, "count": 1}
+        ).sort("completed_at", DESCENDING).limit(limit)
+
+        waits, queue_waits, reasons, per_constituency = [], [], {}, {}
+        for b in cursor:
+            created, completed = as_utc(b["created_at"]), as_utc(b["completed_at"])
+            wait = (completed - created).total_seconds()
+            waits.append(wait)
+            if b.get("queued_at"):
+                queue_waits.append((completed - as_utc(b["queued_at"])).total_seconds())
+            reason = b.get("flush_reason", "size")
+            reasons[reason] = reasons.get(reason, 0) + 1
+            per_constituency.setdefault(self.policy_id(b["district"], b["constituency"]), []).append(wait)
+
+        waits.sort()
+        queue_waits.sort()
+        worst = sorted(
+            ((key, percentile(sorted(v), 0.95)) for key, v in per_constituency.items()),
+            key=lambda kv: -kv[1]
+        )[:10]
+        return {
+            "window_hours": window_hours,
+            "batches": len(waits),
+            "time_to_analysis_seconds": {
+                "p50": percentile(waits, 0.50),
+                "p95": percentile(waits, 0.95),
+                "p99": percentile(waits, 0.99),
+                "max": waits[-1] if waits else None
+            },
+            "queue_to_analysis_seconds": {
+                "p50": percentile(queue_waits, 0.50),
+                "p95": percentile(queue_waits, 0.95)
+            },
+            "flush_reasons": reasons,
+            "slowest_constituencies_p95": [{"scope": key, "p95": p95} for key, p95 in worst],
+            "open_batches": self.batches.count_documents({"status": "collecting"})
+        }
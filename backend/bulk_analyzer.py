@@ -0,0 +1,126 @@
+import numpy as np
+
+from backend.ai_engine import (
+    CATEGORY_KEYWORDS, DURATION_PATTERN, MATCHER,
+    translate_to_english, extract_main_issue, generate_summary
+)
+
+
+# =========================
+# 1. FIXED VOCABULARY
+# =========================
+# Columns of the document-term matrix: every keyword the compiled matcher
+# knows about (category, priority and Tamil keywords).
+VOCABULARY = sorted(MATCHER.tags_by_word)
+TERM_INDEX = {word: i for i, word in enumerate(VOCABULARY)}
+
+# Terms as UTF-8 bytes, grouped by their first two bytes (one byte for
+# one-byte terms): each group's candidate positions come from one pass
+SEPARATOR = b"\x00"   # joins the texts of a chunk; in no term, so no match spans two texts
+TERM_BYTES = [word.encode("utf-8") for word in VOCABULARY]
+TERM_PAD = SEPARATOR * max(map(len, TERM_BYTES))
+TERMS_BY_PREFIX = {}
+for col, term in enumerate(TERM_BYTES):
+    TERMS_BY_PREFIX.setdefault(term[:2], []).append((col, term))
+
+CATEGORIES = list(CATEGORY_KEYWORDS)
+MAIN_ISSUES = [extract_main_issue(c) for c in CATEGORIES] + [extract_main_issue("Other")]
+
+def build_category_weights():
+    """V x C matrix: 1 where a term counts towards a category."""
+    weights = np.zeros((len(VOCABULARY), len(CATEGORIES)), dtype=np.int32)
+    for col, category in enumerate(CATEGORIES):
+        for word in CATEGORY_KEYWORDS[category]:
+            weights[TERM_INDEX[word.lower()], col] = 1
+    return weights
+
+def build_priority_mask(level):
+    mask = np.zeros(len(VOCABULARY), dtype=bool)
+    for word, tags in MATCHER.tags_by_word.items():
+        if ("priority", level) in tags:
+            mask[TERM_INDEX[word]] = True
+    return mask
+
+CATEGORY_WEIGHTS = build_category_weights()
+HIGH_MASK = build_priority_mask("High")
+MEDIUM_MASK = build_priority_mask("Medium")
+
+
+# =========================
+# 2. DOCUMENT-TERM MATRIX
+# =========================
+def document_term_matrix(texts):
+    """
+    Presence matrix (len(texts) x V), same substring matches as
+    MATCHER.find per text. The chunk is lowercased and joined into one
+    byte array; every term is matched over all of it with vectorized byte
+    comparisons (candidates from the term's first bytes, narrowed byte by
+    byte), and match offsets map back to rows by binary search over the
+    texts' start offsets. UTF-8 is self-synchronizing, so byte matches
+    are exactly the character matches.
+    """
+    encoded = [text.lower().encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    starts = np.cumsum(lengths + len(SEPARATOR)) - lengths - len(SEPARATOR)
+    # Padded so that term[k] lookups past the last text stay in bounds
+    data = np.frombuffer(SEPARATOR.join(encoded) + TERM_PAD, dtype=np.uint8)
+    pairs = data[:-1].astype(np.uint16) | (data[1:].astype(np.uint16) << 8)
+
+    matrix = np.zeros((len(texts), len(VOCABULARY)), dtype=np.int32)
+    for prefix, terms in TERMS_BY_PREFIX.items():
+        if len(prefix) == 2:
+            candidates = np.flatnonzero(pairs == (prefix[0] | prefix[1] << 8))
+        else:
+            candidates = np.flatnonzero(data[:-1] == prefix[0])
+        for col, term in terms:
+            offsets = candidates
+            for k in range(len(prefix), len(term)):
+                if not offsets.size:
+                    break
+                offsets = offsets[data[offsets + k] == term[k]]
+            if offsets.size:
+                matrix[np.searchsorted(starts, offsets, side="right") - 1, col] = 1
+    return matrix
+
+
+# =========================
+# 3. VECTORIZED ANALYSIS
+# =========================
+def analyze_chunk(texts):
+    eng_texts = [translate_to_english(t) for t in texts]
+    matrix = document_term_matrix(eng_texts)
+
+    # Category: one matrix product, argmax keeps the first category on ties
+    scores = matrix @ CATEGORY_WEIGHTS
+    best = scores.argmax(axis=1)
+    best[scores.max(axis=1) == 0] = len(CATEGORIES)
+
+    # Priority: masked reductions over the term columns
+    duration = np.fromiter(
+        (DURATION_PATTERN.search(t.lower()) is not None for t in eng_texts),
+        dtype=bool, count=len(eng_texts)
+    )
+    high = duration | matrix[:, HIGH_MASK].any(axis=1)
+    medium = matrix[:, MEDIUM_MASK].any(axis=1)
+    priorities = np.where(high, "High", np.where(medium, "Medium", "Low"))
+
+    categories = CATEGORIES + ["Other"]
+    return [
+        {
+            "category": categories[b],
+            "priority": str(p),
+            "main_issue": MAIN_ISSUES[b],
+            "summary": generate_summary(t)
+        }
+        for b, p, t in zip(best.tolist(), priorities, eng_texts)
+    ]
+
+def analyze_feedback_bulk(feedback_list, chunk_size=10000):
+    """
+    Same output as analyze_feedback_batch, computed chunk by chunk with
+    matrix operations instead of per-item keyword scans.
+    """
+    results = []
+    for start in range(0, len(feedback_list), chunk_size):
+        results.extend(analyze_chunk(feedback_list[start:start + chunk_size]))
+    return results
@@ -0,0 +1,157 @@
+import os
+import time
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+from backend.batch_scheduler import as_utc
+
+load_dotenv()
+
+# Tunables (override through .env)
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "512"))
+DASHBOARD_CACHE_MAX_BYTES = int(os.getenv("DASHBOARD_CACHE_MAX_MB", "64")) * 1024 * 1024
+# Upper bound on staleness for data that changes without a batch completing (e.g. new submissions)
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+DASHBOARD_CACHE_POLL_SECONDS = float(os.getenv("DASHBOARD_CACHE_POLL_SECONDS", "5"))
+
+
+# --------------------------------------------------
+# Shared Dashboard Cache
+# --------------------------------------------------
+class DashboardCache:
+    """
+    Query results shared by every dashboard session of the process, keyed
+    by the query and the user's scope. Concurrent misses on one key run the
+    query once; the others wait for its result. Entries are dropped when a
+    batch of a district in their scope completes, after `ttl_seconds` at the
+    latest, and least-recently-used first beyond `max_entries` / `max_bytes`.
+    Cached values are shared: treat them as read-only.
+    """
+
+    def __init__(self, max_entries=DASHBOARD_CACHE_MAX_ENTRIES, max_bytes=DASHBOARD_CACHE_MAX_BYTES,
+                 ttl_seconds=DASHBOARD_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (value, districts, size, expires_at)
+        self._inflight = {}             # key -> Event of the computing caller
+        self._bytes = 0
+        self._epoch = 0                 # bumped by invalidate(): results computed across it aren't kept
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def scope_key(role, districts, category):
+        return role, tuple(sorted(districts)) if districts is not None else None, category
+
+    def get(self, name, scope, compute, args=()):
+        """
+        Cached `compute()` for (name, scope, args). scope is scope_key(...);
+        its districts (None: statewide) decide which completions invalidate it.
+        """
+        key = (name, scope, args)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[3] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    epoch = self._epoch
+                    break
+            # Someone else is computing this key: share their result
+            waiting.wait()
+
+        try:
+            value = compute()
+            self._store(key, value, scope[1], epoch)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _store(self, key, value, districts, epoch):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._drop(key)
+            self._entries[key] = (value, districts, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[2]
+
+    def invalidate(self, district=None):
+        """Drops entries whose scope covers `district` (statewide ones included); None drops all."""
+        with self._lock:
+            self._epoch += 1
+            stale = [
+                key for key, (_, districts, _, _) in self._entries.items()
+                if district is None or districts is None or district in districts
+            ]
+            for key in stale:
+                self._drop(key)
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    # ---------------- INVALIDATION FEED ----------------
+    def watch_batches(self, batches, stop=None, poll_seconds=DASHBOARD_CACHE_POLL_SECONDS):
+        """
+        Invalidates on every batch completion, from a change stream on
+        `batches`; without one (standalone mongod) it polls completed_at.
+        Blocks: run it in a daemon thread.
+        """
+        stop = stop or threading.Event()
+        pipeline = [{"$match": {
+            "operationType": "update",
+            "updateDescription.updatedFields.status": "completed"
+        }}]
+        try:
+            with batches.watch(pipeline, full_document="updateLookup") as stream:
+                print("👀 Dashboard cache: watching batch completions (change stream)")
+                while not stop.is_set():
+                    change = stream.try_next()
+                    if change is None:
+                        stop.wait(0.5)
+                        continue
+                    self.invalidate((change.get("fullDocument") or {}).get("district"))
+            return
+        except PyMongoError as e:
+            print(f"⚠️ Dashboard cache: change stream unavailable ({e}), polling every {poll_seconds}s")
+
+        since = datetime.now(timezone.utc)
+        while not stop.wait(poll_seconds):
+            try:
+                completed = list(batches.find(
+                    {"status": "completed", "completed_at": {"$gt": since}}, {"district": 1, "completed_at": 1}
+                ))
+            except PyMongoError as e:
+                print(f"⚠️ Dashboard cache poll failed: {e}")
+                continue
+            for batch in completed:
+                self.invalidate(batch.get("district"))
+                since = max(since, as_utc(batch["completed_at"]))
+
+    def start_watcher(self, batches):
+        threading.Thread(target=self.watch_batches, args=(batches,), daemon=True).start()
+        return self
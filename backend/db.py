@@ -14,7 +14,7 @@ print("DEBUG: MONGODB_URI =", MONGODB_URI)
 # Connect to MongoDB
 client = MongoClient(MONGODB_URI)
 
-db = client["feedback_ai_db"]
+db = client[os.getenv("MONGODB_DB", "feedback_ai_db")]
 collection = db["feedbacks"]
 
 from pymongo import MongoClient
@@ -32,7 +32,7 @@ print("DEBUG: MONGODB_URI =", MONGODB_URI)
 # Connect to MongoDB
 client = MongoClient(MONGODB_URI)
 
-db = client["feedback_ai_db"]
+db = client[os.getenv("MONGODB_DB", "feedback_ai_db")]
 
 
 # Collections
@@ -40,3 +40,12 @@ feedbacks = db["feedbacks"]              # user submitted feedback
 batches = db["batches"]                  # batch tracking (15 limit)
 analysis_results = db["analysis_results"]# AI analysis output
 global_issues = db["global_issues"]
+issue_reporters = db["issue_reporters"]  # bucketed reporters of each global issue
+issue_districts = db["issue_districts"]  # report counts of each global issue per district
+feedback_rollups = db["feedback_rollups"]  # dashboard counters per jurisdiction/category/day
+analysis_cache = db["analysis_cache"]    # cached AI results (TTL)
+near_duplicate_index = db["near_duplicate_index"]  # MinHash signatures (TTL)
+issue_clusters = db["issue_clusters"]    # incremental issue clustering state
+analysis_jobs = db["analysis_jobs"]      # background analysis queue (leased jobs)
+batch_policies = db["batch_policies"]    # per-constituency batch sizing / flush SLOs
+migrations = db["migrations"]            # one marker per data migration that has run
@@ -0,0 +1,156 @@
+import io
+import os
+import csv
+import tempfile
+from datetime import timezone
+
+from dotenv import load_dotenv
+
+from backend.ai_engine import iter_chunks
+
+load_dotenv()
+
+# Rows pulled from Mongo and written per step; memory is bounded by this, not the export size
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+# Files above this spill from memory to a temp file while being written
+SPOOL_BYTES = 8 * 1024 * 1024
+READ_BYTES = 64 * 1024
+
+# --------------------------------------------------
+# Report Columns (same as the dashboard table)
+# --------------------------------------------------
+EXPORT_COLUMNS = ["Name", "District", "Constituency", "Category", "Priority", "Issue", "Feedback", "Date"]
+
+EXPORT_PROJECTION = {
+    "user.name": 1,
+    "location": 1,
+    "ai.category": 1,
+    "ai.priority": 1,
+    "ai.main_issue": 1,
+    "feedback.original_text": 1,
+    "created_at": 1
+}
+
+def export_row(doc):
+    user = doc.get("user", {})
+    location = doc.get("location", {})
+    ai = doc.get("ai", {})
+    created = doc.get("created_at")
+    if created is not None and created.tzinfo is not None:
+        # Excel has no time zones: every export carries naive UTC
+        created = created.astimezone(timezone.utc).replace(tzinfo=None)
+    return [
+        user.get("name") or "N/A",
+        location.get("district") or "N/A",
+        location.get("constituency") or "N/A",
+        ai.get("category", "N/A"),
+        ai.get("priority", "N/A"),
+        ai.get("main_issue", "N/A"),
+        doc.get("feedback", {}).get("original_text", ""),
+        created
+    ]
+
+
+# --------------------------------------------------
+# Writers (generators of bytes)
+# --------------------------------------------------
+def stream_csv(docs, chunk_rows=EXPORT_CHUNK_ROWS):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    # BOM: Excel opens UTF-8 (Tamil text) correctly
+    yield "\ufeff".encode("utf-8") + buffer.getvalue().encode("utf-8")
+    for chunk in iter_chunks(docs, chunk_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [*row[:-1], row[-1].isoformat(sep=" ") if row[-1] else ""] for row in map(export_row, chunk)
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+def drain(spool):
+    spool.seek(0)
+    while True:
+        data = spool.read(READ_BYTES)
+        if not data:
+            return
+        yield data
+
+def stream_xlsx(docs, chunk_rows=EXPORT_CHUNK_ROWS):
+    """openpyxl write-only workbook: rows are serialized as they are appended, never held as cells."""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Feedbacks")
+    sheet.append(EXPORT_COLUMNS)
+    for chunk in iter_chunks(docs, chunk_rows):
+        for doc in chunk:
+            # XML can't hold control characters (pasted text): openpyxl refuses the row
+            sheet.append([
+                ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value
+                for value in export_row(doc)
+            ])
+
+    # The zip container is only complete once saved: spool it, then stream it out
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as spool:
+        workbook.save(spool)
+        yield from drain(spool)
+
+def require_pyarrow():
+    """Parquet needs pyarrow, an optional dependency."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+def stream_parquet(docs, chunk_rows=EXPORT_CHUNK_ROWS):
+    """One Parquet row group per chunk."""
+    pa, pq = require_pyarrow()
+    schema = pa.schema(
+        [(name, pa.string()) for name in EXPORT_COLUMNS[:-1]] + [(EXPORT_COLUMNS[-1], pa.timestamp("ms"))]
+    )
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as spool:
+        with pq.ParquetWriter(spool, schema) as writer:
+            for chunk in iter_chunks(docs, chunk_rows):
+                columns = list(zip(*map(export_row, chunk)))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+        yield from drain(spool)
+
+# format -> (writer, media type, file extension)
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8", "csv"),
+    "xlsx": (stream_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": (stream_parquet, "application/vnd.apache.parquet", "parquet"),
+}
+
+
+def export_feedbacks(collection, query, fmt="xlsx", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Streams the feedbacks matching `query`, newest first, as `fmt` bytes.
+    Nothing is read until the generator is consumed; a missing optional
+    dependency still fails here, before any byte is sent.
+    """
+    writer = EXPORT_FORMATS[fmt][0]
+    if fmt == "parquet":
+        require_pyarrow()
+    cursor = collection.find(query, EXPORT_PROJECTION, batch_size=chunk_rows).sort(
+        [("created_at", -1), ("_id", -1)]
+    )
+    return writer(cursor, chunk_rows)
+
+def export_filename(fmt, label="report"):
+    return f"{label}.{EXPORT_FORMATS[fmt][2]}"
+
+def export_bytes(collection, query, fmt="xlsx", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    The whole export as bytes, for UIs that hand over a finished file, not a
+    stream (e.g. a deferred Streamlit download, built only when clicked).
+    """
+    return b"".join(export_feedbacks(collection, query, fmt, chunk_rows))
@@ -1,53 +1,87 @@
-from datetime import datetime, timezone
+import time
 from uuid import uuid4
-from pymongo import ReturnDocument
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from backend.db import (
+    db, feedbacks, batches, analysis_results, global_issues, issue_reporters, issue_districts, analysis_cache,
+    near_duplicate_index, issue_clusters, analysis_jobs, batch_policies, feedback_rollups, migrations
+)
+from backend.ai_engine import ENGINE_VERSION, iter_chunks
+from backend.analysis_cache import AnalysisCache
+from backend.near_duplicate import NearDuplicateIndex
+from backend.job_queue import JobQueue
+from backend.indexes import GLOBAL_ISSUE_INDEXES, bootstrap_indexes
+from backend.reporters import (
+    RECENT_REPORTERS, reporter_ops, recent_reporters_push, recent_batches_expression,
+    move_reporters, applied_issues
+)
+from backend.accounting import APPLIED_TOKENS, guard, bulk_write_guarded
+from backend.migrations import run_once
+from backend.priority import (
+    priority_fields, PRIORITY_EXPRESSION, PRIORITY_RANK_EXPRESSION
+)
+from backend.rollups import received_ops, analyzed_ops, seed_rollups
+from backend.batch_scheduler import BatchScheduler
+from backend.issue_clustering import IssueClusterer, issue_key_for, relabel_feedbacks
+from backend.parallel_analyzer import AI_WORKERS, AI_CHUNK_SIZE, analyze_parallel
+
+# Repeated complaints ("thanni varala") are analyzed once per engine version
+keyword_cache = AnalysisCache(ENGINE_VERSION, analysis_cache)
+
+# Reworded resubmissions are flagged on arrival and reuse the original's analysis
+near_duplicates = NearDuplicateIndex(near_duplicate_index)
+
+def duplicate_scope(district, constituency):
+    return f"{district}|{constituency}"
+
+# Similar reports of the same district/constituency/category share one global issue
+issue_clusterer = IssueClusterer(issue_clusters)
+
+# Full batches are analyzed by worker.py, off the request path
+job_queue = JobQueue(analysis_jobs)
+ANALYZE_BATCH_JOB = "analyze_batch"
+
+# Batches close at their (adaptive) size limit, max age or latency SLO
+batch_scheduler = BatchScheduler(batches, batch_policies)
 
-from backend.db import feedbacks, batches, analysis_results, global_issues
-from backend.ai_engine import analyze_feedback_batch
+# A filled batch waits this long for submitters that reserved a slot but haven't inserted yet
+SLOT_GRACE_SECONDS = 10
+
+# Feedback docs held in memory at once while analyzing / re-processing
+STREAM_CHUNK_SIZE = 500
+
+# Re-processing hands every pool worker a full chunk per read; smaller reads
+# fit in one AI chunk and would be analyzed in-process (analyze_parallel)
+REANALYZE_CHUNK_SIZE = AI_WORKERS * AI_CHUNK_SIZE
 
 
 # --------------------------------------------------
 # Batch Handling (Hidden)
 # --------------------------------------------------
-def get_or_create_batch(district, constituency, limit=1): # SET TO 15
-    batch = batches.find_one_and_update(
-        {
-            "district": district,
-            "constituency": constituency,
-            "status": "collecting"
-        },
-        {"$inc": {"count": 1}},
-        return_document=ReturnDocument.AFTER
-    )
+def allocate_slots(district, constituency, n=1):
+    """
+    Reserves `n` slots in the constituency's collecting batches, rolling over
+    as they fill. Batches filled by these slots come back with filled=True
+    and must be queued once their feedbacks are stored.
+    """
+    allocations = batch_scheduler.allocate(district, constituency, n)
+    for allocation in allocations:
+        if allocation["filled"] and not allocation["slots"]:
+            enqueue_batch_analysis(allocation["batch_id"])
+    return [a for a in allocations if a["slots"]]
 
-    if not batch:
-        batch = {
-            "batch_id": str(uuid4()),
-            "district": district,
-            "constituency": constituency,
-            "count": 1,
-            "limit": limit,
-            "status": "collecting",
-            "created_at": datetime.now(timezone.utc)
-        }
-        batches.insert_one(batch)
-
-    return batch
+def get_or_create_batch(district, constituency):
+    return allocate_slots(district, constituency, 1)[0]
 
 
 # --------------------------------------------------
 # Main Entry Point
 # --------------------------------------------------
-def process_feedback(form_data):
-
-    # 1. Add to Batch
-    batch = get_or_create_batch(
-        form_data["district"],
-        form_data["constituency"]
-    )
-
-    # 2. Save Feedback
-    feedbacks.insert_one({
+def build_feedback_doc(form_data, batch_id, duplicate=None):
+    feedback_doc = {
         "location": {
             "district": form_data["district"],
             "constituency": form_data["constituency"]
@@ -63,107 +97,736 @@ def process_feedback(form_data):
             "original_text": form_data["feedback_text"],
             "rating": form_data.get("rating")
         },
-        "batch_id": batch["batch_id"],
+        "batch_id": batch_id,
         "created_at": datetime.now(timezone.utc)
-    })
+    }
+    if duplicate:
+        # Still a report (it counts), but its analysis is reused from the original
+        feedback_doc["duplicate_of"] = duplicate[0]
+        feedback_doc["duplicate_similarity"] = round(duplicate[1], 3)
+    return feedback_doc
 
-    # 3. Check Limit (Run AI if full)
-    if batch["count"] >= batch["limit"]:
-        batches.update_one(
-            {"batch_id": batch["batch_id"]},
-            {"$set": {"status": "processing"}}
-        )
-        analyze_and_store_batch(batch["batch_id"])
-        return {"message": "Batch Full (15/15) - AI Analysis Started!"}
+def process_feedback(form_data):
+
+    # 1. Add to Batch
+    batch = get_or_create_batch(
+        form_data["district"],
+        form_data["constituency"]
+    )
+
+    # 2. Near-Duplicate Check (same text, reworded/re-punctuated, same constituency)
+    text = form_data["feedback_text"]
+    scope = duplicate_scope(form_data["district"], form_data["constituency"])
+    signature = near_duplicates.signature(text)
+    duplicate = near_duplicates.query(text, scope=scope, signature=signature)
+
+    # 3. Save Feedback
+    feedback_doc = build_feedback_doc(form_data, batch["batch_id"], duplicate)
+    inserted = feedbacks.insert_one(feedback_doc)
+    feedback_rollups.bulk_write(received_ops([feedback_doc]))
+    if not duplicate:
+        near_duplicates.add(inserted.inserted_id, text, scope=scope, signature=signature)
+
+    # 4. Check Limit (queue AI analysis if this slot filled the batch; age/SLO flushes run in worker.py)
+    if batch["filled"]:
+        enqueue_batch_analysis(batch["batch_id"])
+        return {"message": f"Batch Full ({batch['count']}/{batch['limit']}) - AI Analysis Queued!"}
 
     remaining = batch["limit"] - batch["count"]
     return {"message": f"Feedback stored. Waiting for {remaining} more users."}
 
 
+def group_rows(rows):
+    """{(district, constituency): [row indexes]}, so slots are reserved per group."""
+    groups = {}
+    for i, row in enumerate(rows):
+        groups.setdefault((row["district"], row["constituency"]), []).append(i)
+    return groups
+
+def spread_slots(batch_ids, indexes, allocations):
+    """Hands the group's allocated slots to its rows in order; returns the batches it filled."""
+    slots = iter(indexes)
+    for allocation in allocations:
+        for _ in range(allocation["slots"]):
+            batch_ids[next(slots)] = allocation["batch_id"]
+    return [a["batch_id"] for a in allocations if a["filled"]]
+
+def prepare_chunk_docs(rows, batch_ids):
+    """
+    Feedback docs for a chunk, near-duplicate checked against the index and
+    against earlier rows of the same chunk. Returns (docs, new signatures).
+    """
+    docs, new_signatures = [], []
+    for row, batch_id in zip(rows, batch_ids):
+        text = row["feedback_text"]
+        scope = duplicate_scope(row["district"], row["constituency"])
+        signature = near_duplicates.signature(text)
+        duplicate = near_duplicates.query(text, scope=scope, signature=signature)
+
+        doc = build_feedback_doc(row, batch_id, duplicate)
+        doc["_id"] = ObjectId()
+        docs.append(doc)
+        if not duplicate:
+            near_duplicates.add(doc["_id"], text, scope=scope, signature=signature, persist=False)
+            new_signatures.append((doc["_id"], scope, signature))
+    return docs, new_signatures
+
+def insert_errors(error):
+    """{doc index: message} from an unordered insert_many's BulkWriteError."""
+    return {err["index"]: err.get("errmsg", "write error") for err in error.details.get("writeErrors", [])}
+
+def chunk_results(docs, errors):
+    results = []
+    for i, doc in enumerate(docs):
+        if i in errors:
+            results.append({"status": "error", "error": errors[i]})
+        else:
+            result = {"status": "stored", "id": str(doc["_id"]), "batch_id": doc["batch_id"]}
+            if doc.get("duplicate_of"):
+                result.update({"status": "duplicate", "duplicate_of": str(doc["duplicate_of"])})
+            results.append(result)
+    return results
+
+def process_feedback_chunk(rows):
+    """
+    Bulk counterpart of process_feedback for a chunk of validated form dicts.
+    Slots are reserved once per constituency group (not per row), the chunk
+    is stored with one insert_many, and new near-duplicate signatures are
+    persisted with one bulk write. Returns one result dict per row, in order.
+    """
+    # 1. Batch Slots (one allocation per group, rolling over full batches)
+    batch_ids, filled = [None] * len(rows), []
+    for (district, constituency), indexes in group_rows(rows).items():
+        filled += spread_slots(batch_ids, indexes, allocate_slots(district, constituency, len(indexes)))
+
+    # 2. Near-Duplicates
+    docs, new_signatures = prepare_chunk_docs(rows, batch_ids)
+
+    # 3. Save Feedbacks
+    errors = {}
+    try:
+        feedbacks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = insert_errors(e)
+    inserted = {doc["_id"] for i, doc in enumerate(docs) if i not in errors}
+    if inserted:
+        feedback_rollups.bulk_write(received_ops(d for d in docs if d["_id"] in inserted), ordered=False)
+    near_duplicates.persist_many([entry for entry in new_signatures if entry[0] in inserted])
+
+    # 4. Queue Filled Batches (now that their feedbacks are stored)
+    for batch_id in filled:
+        enqueue_batch_analysis(batch_id)
+
+    return chunk_results(docs, errors)
+
+
+def ensure_indexes():
+    """
+    Bootstrap: migrates data the unique indexes can't be built over, then
+    creates every declared index (backend/indexes.py); idempotent. Returns
+    {collection: error} for collections left without their indexes.
+    """
+    closed = batch_scheduler.close_duplicate_batches()
+    for batch_id in closed:
+        enqueue_batch_analysis(batch_id)
+    if closed:
+        print(f"🧹 Closed and queued {len(closed)} duplicate collecting batches")
+    marked = run_once(migrations, "feedbacks.accounted_batch", mark_legacy_accounted)
+    if marked:
+        print(f"🧾 Marked {marked} previously analyzed feedbacks as counted")
+    counted = run_once(migrations, "issue_districts.backfill", backfill_issue_districts)
+    if counted:
+        print(f"🗺️ Backfilled {counted} per-district issue counters")
+    merged = merge_duplicate_issues()
+    if merged:
+        print(f"🧹 Merged {merged} duplicate global issues")
+    return bootstrap_indexes(db)
+
+def mark_legacy_accounted():
+    """Feedbacks analyzed before accounted_batch existed were counted with their analysis."""
+    return feedbacks.update_many(
+        {"ai": {"$exists": True}, "accounted_batch": {"$exists": False}, "accounting": {"$exists": False}},
+        [{"$set": {"accounted_batch": {"$ifNull": ["$batch_id", None]}}}]
+    ).modified_count
+
+
 # --------------------------------------------------
 # AI Processing
 # --------------------------------------------------
+def batch_job_key(batch_id):
+    return f"{ANALYZE_BATCH_JOB}:{batch_id}"
+
+def enqueue_batch_analysis(batch_id):
+    return job_queue.enqueue(ANALYZE_BATCH_JOB, {"batch_id": batch_id}, key=batch_job_key(batch_id))
+
+def flush_batch(batch_id, reason):
+    """Closes a collecting batch and queues its analysis; False if someone else already did."""
+    if not batch_scheduler.close(batch_id, reason):
+        return False
+    enqueue_batch_analysis(batch_id)
+    return True
+
+def flush_due_batches():
+    """Closes every collecting batch past its flush deadline (age or SLO)."""
+    flushed = 0
+    for batch in batch_scheduler.due_batches():
+        flushed += flush_batch(batch["batch_id"], batch.get("flush_trigger", "age"))
+    return flushed
+
+def recover_stuck_batches():
+    """Queues batches left "queued"/"processing" without a job (e.g. by the old inline path)."""
+    pending = [b["batch_id"] for b in batches.find({"status": {"$in": ["queued", "processing"]}}, {"batch_id": 1})]
+    if not pending:
+        return 0
+
+    queued = {j["key"] for j in analysis_jobs.find({"key": {"$in": [batch_job_key(b) for b in pending]}}, {"key": 1})}
+    missing = [b for b in pending if batch_job_key(b) not in queued]
+    for batch_id in missing:
+        enqueue_batch_analysis(batch_id)
+    return len(missing)
+
 def analyze_and_store_batch(batch_id):
+    """
+    Runs in a worker. Only feedbacks not yet counted (no accounted_batch)
+    are picked up, so a retry after a crash resumes the batch; see
+    account_chunk for why nothing is counted twice or lost.
+    Errors propagate: the job queue decides between retry and "failed".
+    """
     print(f"🚀 Analyzing Batch: {batch_id}")
-    
-    docs = list(feedbacks.find({"batch_id": batch_id}))
-    texts = [d["feedback"]["original_text"] for d in docs]
+    batch = batches.find_one_and_update(
+        {"batch_id": batch_id}, {"$set": {"status": "processing"}}, return_document=ReturnDocument.AFTER
+    )
+    if batch:
+        wait_for_slots(batch)
 
-    try:
-        results = analyze_feedback_batch(texts)
-    except Exception as e:
-        print(f"❌ AI Failed: {e}")
-        return
+    cursor = feedbacks.find(
+        {"batch_id": batch_id, "accounted_batch": {"$exists": False}}, batch_size=STREAM_CHUNK_SIZE
+    )
+    for _ in stream_analyze_and_store(cursor, batch_id=batch_id):
+        pass
 
-    # Update Feedback Docs
-    for doc, res in zip(docs, results):
-        feedbacks.update_one(
-            {"_id": doc["_id"]},
-            {"$set": {"ai": res}}
-        )
+    # Mark Batch Complete (and feed its timings back into the flush policy)
+    batch = batches.find_one_and_update(
+        {"batch_id": batch_id},
+        {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER
+    )
+    if batch:
+        batch_scheduler.record_completion(batch)
+    print(f"✅ Batch {batch_id} Completed.")
 
-    # Update Global Issues (Smart Merging)
-    update_global_issues(docs, batch_id)
+def wait_for_slots(batch, grace_seconds=SLOT_GRACE_SECONDS):
+    """Slots are reserved before their feedback is inserted: give in-flight inserts a moment."""
+    deadline = time.monotonic() + grace_seconds
+    while time.monotonic() < deadline:
+        if feedbacks.count_documents({"batch_id": batch["batch_id"]}) >= batch.get("count", 0):
+            return True
+        time.sleep(0.2)
+    print(f"⚠️ Batch {batch['batch_id']}: some reserved slots were never filled")
+    return False
 
-    # Mark Batch Complete
+def mark_batch_failed(batch_id, error):
     batches.update_one(
         {"batch_id": batch_id},
-        {"$set": {"status": "completed"}}
+        {"$set": {"status": "failed", "error": str(error)[:500]}}
     )
-    print(f"✅ Batch {batch_id} Completed.")
+    print(f"❌ AI Failed for batch {batch_id}: {error}")
+
+
+def reuse_duplicate_analysis(chunk):
+    """{index in chunk: ai} for near-duplicates whose original is already analyzed."""
+    originals = {d["duplicate_of"] for d in chunk if d.get("duplicate_of")}
+    if not originals:
+        return {}
+
+    analyzed = {
+        d["_id"]: d["ai"]
+        for d in feedbacks.find({"_id": {"$in": list(originals)}, "ai": {"$exists": True}}, {"ai": 1})
+    }
+    return {
+        i: dict(analyzed[d["duplicate_of"]])
+        for i, d in enumerate(chunk)
+        if d.get("duplicate_of") in analyzed
+    }
+
+def analyze_docs(docs, reuse_duplicates=True):
+    """Analysis results for `docs`, in order (near-duplicates reuse their original's)."""
+    results = reuse_duplicate_analysis(docs) if reuse_duplicates else {}
+    pending = [i for i in range(len(docs)) if i not in results]
+    texts = [docs[i]["feedback"]["original_text"] for i in pending]
+    for i, res in zip(pending, keyword_cache.analyze_many(texts, analyze_parallel)):
+        results[i] = res
+    return [results[i] for i in range(len(docs))]
+
+def stream_analyze_and_store(docs, chunk_size=STREAM_CHUNK_SIZE, batch_id=None,
+                             update_issues=True, reuse_duplicates=True):
+    """
+    Analyzes feedback docs from any iterable or Mongo cursor and yields
+    (feedback _id, result) lazily. Results are written back one chunk at a
+    time, so memory stays bounded by `chunk_size` however large the input.
+    With update_issues, each chunk is counted once (account_chunk); docs
+    another worker already counted are skipped and not yielded.
+    """
+    for chunk in iter_chunks(docs, chunk_size):
+        if update_issues:
+            yield from account_chunk(chunk, batch_id, reuse_duplicates)
+            continue
+
+        results = analyze_docs(chunk, reuse_duplicates)
+        for doc, res in zip(chunk, results):
+            if doc.get("ai", {}).get("issue_key"):
+                res["issue_key"] = doc["ai"]["issue_key"]
+
+        # Update Feedback Docs (one round trip per chunk)
+        feedbacks.bulk_write([
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"ai": res}})
+            for doc, res in zip(chunk, results)
+        ], ordered=False)
+
+        # Move the feedbacks' dashboard counters (old -> new category)
+        rollup_updates = analyzed_ops(chunk, results)
+        if rollup_updates:
+            feedback_rollups.bulk_write(rollup_updates, ordered=False)
+
+        for doc, res in zip(chunk, results):
+            doc["ai"] = res
+            yield doc["_id"], res
+
+
+# --------------------------------------------------
+# Counting Analyzed Feedbacks (exactly once)
+# --------------------------------------------------
+# A chunk is claimed under a fresh token: one conditional update per feedback
+# stores its analysis and {"accounting": {"token", "prior"}}, and only the
+# feedbacks whose update matched are counted here (a worker that lost its
+# job lease can't count them again). Counter writes are guarded by the token
+# (backend/accounting.py), and accounted_batch is set last. A retry finds
+# the feedbacks still carrying the token and redoes the counting under it:
+# counters that already hold it are skipped, the others catch up.
+
+def account_chunk(chunk, batch_id, reuse_duplicates=True):
+    """Yields (feedback _id, result) for the docs of `chunk` counted by this call."""
+    # Left mid-count by a crashed attempt: finished under their token
+    fresh, resumed = [], {}
+    for doc in chunk:
+        if doc.get("accounting"):
+            resumed.setdefault(doc["accounting"]["token"], []).append(doc)
+        else:
+            fresh.append(doc)
+
+    if fresh:
+        token = uuid4().hex
+        claimed = claim_for_accounting(fresh, analyze_docs(fresh, reuse_duplicates), token)
+        yield from count_claimed(claimed, token, batch_id)
+    for token, docs in resumed.items():
+        yield from count_claimed(docs, token, batch_id, resumed=True)
+
+def claim_for_accounting(docs, results, token):
+    """Stores the analyses and claims the docs not claimed or counted yet; returns the claimed docs."""
+    accounting = [
+        {"token": token, "prior": {k: doc["ai"].get(k) for k in ("category", "priority")} if doc.get("ai") else None}
+        for doc in docs
+    ]
+    feedbacks.bulk_write([
+        UpdateOne(
+            {"_id": doc["_id"], "accounted_batch": {"$exists": False}, "accounting": {"$exists": False}},
+            {"$set": {"ai": res, "accounting": acc}}
+        )
+        for doc, res, acc in zip(docs, results, accounting)
+    ], ordered=False)
+
+    owned = {d["_id"] for d in feedbacks.find(
+        {"_id": {"$in": [doc["_id"] for doc in docs]}, "accounting.token": token}, {"_id": 1}
+    )}
+    claimed = []
+    for doc, res, acc in zip(docs, results, accounting):
+        if doc["_id"] in owned:
+            doc["ai"], doc["accounting"] = res, acc
+            claimed.append(doc)
+    return claimed
+
+def count_claimed(docs, token, batch_id, resumed=False):
+    """Counts claimed docs into clusters, rollups and global issues, then marks them counted."""
+    if not docs:
+        return
+    ids = [doc["_id"] for doc in docs]
+
+    # 1. Issue Clusters (a resumed doc may already carry its issue_key)
+    events = []
+    unassigned = [doc for doc in docs if not doc["ai"].get("issue_key")]
+    if unassigned:
+        events = assign_issue_clusters(unassigned, [doc["ai"] for doc in unassigned])
+        feedbacks.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"], "accounting.token": token, "ai.issue_key": {"$exists": False}},
+                {"$set": {"ai.issue_key": doc["ai"]["issue_key"], "ai.issue_keywords": doc["ai"]["issue_keywords"]}}
+            )
+            for doc in unassigned
+        ], ordered=False)
+        if resumed:
+            # Another worker resuming the same token may have stored its keys first
+            stored = {d["_id"]: d["ai"] for d in feedbacks.find(
+                {"_id": {"$in": [doc["_id"] for doc in unassigned]}}, {"ai.issue_key": 1, "ai.issue_keywords": 1}
+            )}
+            for doc in unassigned:
+                doc["ai"].update(stored.get(doc["_id"], {}))
+
+    # 2. Dashboard Counters (pending -> analyzed, from the analysis the doc had when claimed)
+    bulk_write_guarded(feedback_rollups, analyzed_ops(
+        [dict(doc, ai=doc["accounting"]["prior"]) for doc in docs], [doc["ai"] for doc in docs], token
+    ))
+
+    # 3. Global Issues (Smart Merging)
+    update_global_issues(docs, batch_id, token, resumed)
+    apply_cluster_events(events)
+
+    # 4. Done: a retry no longer picks these up
+    feedbacks.update_many(
+        {"_id": {"$in": ids}, "accounting.token": token},
+        {"$set": {"accounted_batch": batch_id}, "$unset": {"accounting": ""}}
+    )
+    for doc in docs:
+        yield doc["_id"], doc["ai"]
+
+
+def reanalyze_feedbacks(query=None, chunk_size=REANALYZE_CHUNK_SIZE):
+    """
+    Historical re-processing (e.g. after an ENGINE_VERSION bump) in constant
+    memory. Global issue counts are left alone, the reports were already
+    counted when the feedback was first analyzed. Feedbacks a worker is
+    counting right now are skipped.
+    """
+    cursor = feedbacks.find({**(query or {}), "accounting": {"$exists": False}}, batch_size=chunk_size)
+    processed = 0
+    for _ in stream_analyze_and_store(cursor, chunk_size, update_issues=False, reuse_duplicates=False):
+        processed += 1
+    return processed
 
 
 # --------------------------------------------------
 # Global Issue Merging (Smart Logic)
 # --------------------------------------------------
-def calculate_priority(count):
-    if count >= 20: return "CRITICAL"
-    elif count >= 10: return "HIGH"
-    elif count >= 5: return "MEDIUM"
-    return "LOW"
+_issue_index_ready = False
 
-def update_global_issues(docs, batch_id):
+def ensure_issue_index():
+    """
+    Unique issue_key, so concurrent upserts of a new issue can't create it
+    twice. Retried on the next call if it fails (e.g. over duplicate keys,
+    which the bootstrap merges: merge_duplicate_issues).
+    """
+    global _issue_index_ready
+    if _issue_index_ready:
+        return
+    try:
+        global_issues.create_indexes(GLOBAL_ISSUE_INDEXES)
+    except PyMongoError as e:
+        print(f"⚠️ Could not create unique issue_key index: {e}")
+        return
+    _issue_index_ready = True
+
+def merge_duplicate_issues():
+    """
+    Folds global issues sharing an issue_key (upserts that raced before the
+    unique index existed) into the oldest of them; returns how many were
+    merged away. Reporter buckets and district counters are keyed by
+    issue_key, so they already belong to the kept issue.
+    """
+    merged = 0
+    now = datetime.now(timezone.utc)
+    for group in global_issues.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$issue_key", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}}
+    ], allowDiskUse=True):
+        keep, *extras = group["ids"]
+        for extra in extras:
+            source = global_issues.find_one_and_delete({"_id": extra})
+            if not source:
+                continue
+            global_issues.update_one({"_id": keep}, [
+                {"$set": absorb_issue(source, now)},
+                {"$set": {"priority": PRIORITY_EXPRESSION, "priority_rank": PRIORITY_RANK_EXPRESSION}}
+            ])
+            merged += 1
+    return merged
+
+def absorb_issue(source, now):
+    """$set stage adding the `source` issue's reports, reporters, batches and tokens to the matched one."""
+    return {
+        "total_reports": {"$add": [{"$ifNull": ["$total_reports", 0]}, source.get("total_reports", 0)]},
+        "users": {"$slice": [
+            {"$concatArrays": [{"$ifNull": ["$users", []]}, {"$literal": source.get("users", [])}]},
+            -RECENT_REPORTERS
+        ]},
+        "batches": recent_batches_expression(source.get("batches", [])),
+        # chunks counted on the source stay recognisable on retry
+        "applied": {"$slice": [
+            {"$concatArrays": [{"$ifNull": ["$applied", []]}, {"$literal": source.get("applied", [])}]},
+            -APPLIED_TOKENS
+        ]},
+        "last_updated": now
+    }
+
+def aggregate_issue_updates(docs, batch_id):
+    """Folds a chunk's analyzed feedbacks into one pending update per issue_key."""
+    grouped = {}
     for fb in docs:
         if "ai" not in fb: continue
-        
-        category = fb["ai"].get("category", "Other")
-        main_issue = fb["ai"].get("main_issue", "General Issue")
-        
-        # UNIQUE KEY: Merges same issues across different batches
-        issue_key = f"{category}_{main_issue}".replace(" ", "_").lower()
-        
-        user_info = {
+
+        # UNIQUE KEY: the issue cluster (legacy docs: category + main issue)
+        issue_key = issue_key_for(fb["ai"])
+        location = fb.get("location", {})
+
+        group = grouped.get(issue_key)
+        if group is None:
+            group = grouped[issue_key] = {
+                "category": fb["ai"].get("category", "Other"),
+                "issue_text": fb["ai"].get("main_issue", "General Issue"),
+                "district": location.get("district"),
+                "constituency": location.get("constituency"),
+                "reports": 0,
+                "districts": {},
+                "users": []
+            }
+        group["reports"] += 1
+        district = location.get("district")
+        group["districts"][district] = group["districts"].get(district, 0) + 1
+        group["keywords"] = fb["ai"].get("issue_keywords", [])
+        group["users"].append({
             "name": fb["user"]["name"],
             "booth": fb["user"]["booth_no"],
             "batch_id": batch_id
-        }
+        })
+    return grouped
+
+def update_global_issues(docs, batch_id, token=None, resumed=False):
+    """
+    Four round trips per chunk, however many feedbacks or issues it holds:
+    the reporters go to their buckets, one unordered bulk of atomic upserts
+    ($inc / $setOnInsert) updates the issues and another their per-district
+    counters, then one server-side pass recomputes priority and the recent
+    batches of the touched issues. Issue documents only keep the latest
+    reporters and batches. With a `token`, a chunk retried under it is
+    counted once (account_chunk).
+    """
+    grouped = aggregate_issue_updates(docs, batch_id)
+    if not grouped:
+        return
+
+    ensure_issue_index()
+    now = datetime.now(timezone.utc)
+    skip = applied_issues(issue_reporters, grouped, token) if resumed else set()
+    users = {issue_key: group["users"] for issue_key, group in grouped.items() if issue_key not in skip}
+    if users:
+        issue_reporters.bulk_write(reporter_ops(users, now, token), ordered=False)
+    bulk_write_guarded(global_issues, [
+        UpdateOne(
+            *guard({"issue_key": issue_key}, {
+                "$inc": {"total_reports": group["reports"]},
+                "$push": {"users": recent_reporters_push(group["users"])},
+                "$set": {"keywords": group["keywords"], "last_updated": now},
+                "$setOnInsert": {
+                    "category": group["category"],
+                    "issue_text": group["issue_text"],
+                    "district": group["district"],
+                    "constituency": group["constituency"],
+                    "reporters_migrated": True      # bucketed from the start
+                }
+            }, token),
+            upsert=True
+        )
+        for issue_key, group in grouped.items()
+    ])
+    # Issue keys are statewide: jurisdiction dashboards rank these instead
+    bulk_write_guarded(issue_districts, [
+        UpdateOne(
+            *guard({"issue_key": issue_key, "district": district}, {
+                "$inc": {"total_reports": reports},
+                "$setOnInsert": {"category": group["category"]}
+            }, token),
+            upsert=True
+        )
+        for issue_key, group in grouped.items()
+        for district, reports in group["districts"].items()
+    ])
+
+    global_issues.update_many(
+        {"issue_key": {"$in": list(grouped)}},
+        [{"$set": {
+            "priority": PRIORITY_EXPRESSION,
+            "priority_rank": PRIORITY_RANK_EXPRESSION,
+            "batches": recent_batches_expression([batch_id])
+        }}]
+    )
+
+def rank_global_issues():
+    """Backfills priority_rank on issues written before it existed; returns how many."""
+    return global_issues.update_many(
+        {"priority_rank": {"$exists": False}},
+        [{"$set": {"priority": PRIORITY_EXPRESSION, "priority_rank": PRIORITY_RANK_EXPRESSION}}]
+    ).modified_count
+
+def seed_feedback_rollups():
+    """
+    Fills feedback_rollups once on databases written before it existed (the
+    migration marker, not an empty collection, tells); returns how many
+    counters, None once seeded. Feedbacks submitted while it runs are not
+    counted: start the workers before reopening intake, or run
+    `python -m backend.rollups --rebuild` later with writers stopped.
+    """
+    return run_once(migrations, "feedback_rollups.seed", lambda: seed_rollups(feedbacks, feedback_rollups))
+
+def backfill_issue_districts():
+    """
+    Per-district counters of issues counted before issue_districts existed,
+    rebuilt from their feedbacks; returns how many counters.
+    """
+    counters = {}
+    for row in feedbacks.aggregate([
+        {"$match": {"ai": {"$exists": True}, "accounted_batch": {"$exists": True}}},
+        {"$group": {
+            "_id": {
+                "issue_key": "$ai.issue_key", "category": "$ai.category",
+                "main_issue": "$ai.main_issue", "district": "$location.district"
+            },
+            "reports": {"$sum": 1}
+        }}
+    ], allowDiskUse=True):
+        ai = {field: value for field, value in row["_id"].items() if value is not None}
+        key = (issue_key_for(ai), ai.get("district"))
+        counter = counters.setdefault(key, {"category": ai.get("category", "Other"), "total_reports": 0})
+        counter["total_reports"] += row["reports"]
+    if counters:
+        issue_districts.bulk_write([
+            UpdateOne({"issue_key": issue_key, "district": district}, {"$set": counter}, upsert=True)
+            for (issue_key, district), counter in counters.items()
+        ], ordered=False)
+    return len(counters)
 
-        existing = global_issues.find_one({"issue_key": issue_key})
 
-        if existing:
-            # Add to existing Global Issue
-            new_total = existing["total_reports"] + 1
+# --------------------------------------------------
+# Issue Clustering
+# --------------------------------------------------
+def assign_issue_clusters(chunk, results):
+    """Puts each analyzed feedback into its nearest issue cluster; returns split/merge events."""
+    scopes = [
+        IssueClusterer.scope_key(d["location"]["district"], d["location"]["constituency"], r["category"])
+        for d, r in zip(chunk, results)
+    ]
+    issue_clusterer.refresh(scopes)
+
+    events = []
+    for doc, res, scope in zip(chunk, results, scopes):
+        cluster_id, cluster_events = issue_clusterer.assign(
+            doc["_id"],
+            res.get("summary") or doc["feedback"]["original_text"],
+            doc["location"]["district"],
+            doc["location"]["constituency"],
+            res["category"],
+            res["main_issue"]
+        )
+        res["issue_key"] = cluster_id
+        res["issue_keywords"] = issue_clusterer.keywords(cluster_id, scope)
+        events.extend(cluster_events)
+    return events
+
+def apply_cluster_events(events):
+    """Moves report counts between global issues when clusters merge or split."""
+    now = datetime.now(timezone.utc)
+    for event in events:
+        if event[0] == "merge":
+            _, source_key, target_key = event
+            source = global_issues.find_one_and_delete({"issue_key": source_key})
+            if not source:
+                continue
+            move_reporters(issue_reporters, source_key, target_key)
+            move_district_reports(source_key, target_key)
+            target = global_issues.find_one_and_update(
+                {"issue_key": target_key},
+                [{"$set": absorb_issue(source, now)}],
+                return_document=ReturnDocument.AFTER
+            )
+            if target:
+                global_issues.update_one(
+                    {"issue_key": target_key},
+                    {"$set": priority_fields(target["total_reports"])}
+                )
+            else:
+                # Target had no global issue yet: the source's becomes it
+                source["issue_key"] = target_key
+                global_issues.insert_one(source)
+
+        elif event[0] == "split":
+            _, source_key, new_key, _, fraction = event
+            source = global_issues.find_one({"issue_key": source_key})
+            if not source:
+                continue
+            moved = min(source["total_reports"] - 1, max(1, round(source["total_reports"] * fraction)))
+            if moved <= 0:
+                continue
+            # The new issue may already exist: feedbacks of this chunk that joined the
+            # new cluster were upserted under it by update_global_issues
             global_issues.update_one(
-                {"issue_key": issue_key},
+                {"issue_key": new_key},
                 {
-                    "$inc": {"total_reports": 1},
-                    "$push": {"users": user_info},
-                    "$addToSet": {"batches": batch_id},
-                    "$set": {
-                        "priority": calculate_priority(new_total),
-                        "last_updated": datetime.now(timezone.utc)
+                    "$inc": {"total_reports": moved},
+                    "$set": {"last_updated": now},
+                    # chunks counted on the source stay recognisable on retry
+                    "$push": {"applied": {"$each": source.get("applied", []), "$slice": -APPLIED_TOKENS}},
+                    "$setOnInsert": {
+                        "category": source["category"],
+                        "issue_text": source["issue_text"],
+                        "district": source.get("district"),
+                        "constituency": source.get("constituency"),
+                        "keywords": [],
+                        "batches": source.get("batches", [])[-5:],
+                        "users": [],      # reporter buckets stay with the source issue
+                        "reporters_migrated": True
                     }
-                }
+                },
+                upsert=True
             )
-        else:
-            # Create New Global Issue
-            global_issues.insert_one({
-                "issue_key": issue_key,
-                "category": category,
-                "issue_text": main_issue,
-                "total_reports": 1,
-                "priority": "LOW",
-                "batches": [batch_id],
-                "users": [user_info],
-                "last_updated": datetime.now(timezone.utc)
-            })
\ No newline at end of file
+            # Only once the reports have landed on the new issue are they taken off the source
+            global_issues.update_one(
+                {"issue_key": source_key},
+                {"$inc": {"total_reports": -moved}, "$set": {"last_updated": now}}
+            )
+            move_district_reports(source_key, new_key, district=source.get("district"), reports=moved)
+            global_issues.update_many(
+                {"issue_key": {"$in": [source_key, new_key]}},
+                [{"$set": {"priority": PRIORITY_EXPRESSION, "priority_rank": PRIORITY_RANK_EXPRESSION}}]
+            )
+
+    relabel_feedbacks(feedbacks, events, "ai.issue_key")
+
+def move_district_reports(source_key, target_key, district=None, reports=None):
+    """
+    Moves per-district counters between issues: all of them (merge), or
+    `reports` of one district (split; clusters never span districts).
+    """
+    query = {"issue_key": source_key}
+    if reports is not None:
+        query["district"] = district
+    moves = [
+        (counter, counter["total_reports"] if reports is None else min(counter["total_reports"], reports))
+        for counter in issue_districts.find(query)
+    ]
+    if not moves:
+        return
+    issue_districts.bulk_write([
+        UpdateOne(
+            {"issue_key": target_key, "district": counter["district"]},
+            {
+                "$inc": {"total_reports": moved},
+                # chunks counted on the source stay recognisable on retry
+                "$push": {"applied": {"$each": counter.get("applied", []), "$slice": -APPLIED_TOKENS}},
+                "$setOnInsert": {"category": counter.get("category")}
+            },
+            upsert=True
+        )
+        for counter, moved in moves
+    ], ordered=False)
+    if reports is None:
+        issue_districts.delete_many(query)
+    else:
+        issue_districts.update_one(query, {"$inc": {"total_reports": -moves[0][1]}})
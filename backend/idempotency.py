@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Tunables (override through .env)
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_WINDOW_SECONDS = int(os.getenv("IDEMPOTENCY_WINDOW_SECONDS", "120"))   # derived keys
+IDEMPOTENCY_DERIVE_KEYS = os.getenv("IDEMPOTENCY_DERIVE_KEYS", "1") == "1"
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "5"))     # replay of an in-flight request
+# A pending claim older than this is taken to be from a crashed request and may be taken over.
+# Keep it well above the time a submission takes, or a slow original is processed twice.
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "30"))
+
+
+# --------------------------------------------------
+# Idempotency Keys
+# --------------------------------------------------
+# A submission claims its key (unique _id, TTL on created_at) before it
+# touches batches or feedbacks, and stores its response once done. A retry
+# with the same key finds the claim and gets that response back instead of
+# being stored, counted and analyzed a second time. A claim left pending by
+# a crashed request is taken over once its lease (claimed_at) runs out; one
+# marked "stored" (the feedback was inserted) is never processed again, its
+# response is replayed.
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request, or its original is still running."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _digest(*parts):
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+def fingerprint(form_data):
+    """Hash of the request body, to catch a key reused for another submission."""
+    return _digest(json.dumps(form_data, sort_keys=True, default=str))
+
+def client_key(route, value):
+    return f"{route}:client:{_digest(value)}"
+
+def derived_key(route, form_data, now=None):
+    """
+    Same body (booth, name, text, ...) within the same time window. A retry
+    that straddles a window boundary gets a new key and is stored again.
+    """
+    now = now or datetime.now(timezone.utc)
+    window = int(now.timestamp()) // IDEMPOTENCY_WINDOW_SECONDS
+    return f"{route}:derived:" + _digest(fingerprint(form_data), window)
+
+def request_key(route, form_data, header=None):
+    """The client's Idempotency-Key if sent, else a derived one (None when disabled)."""
+    if header:
+        return client_key(route, header)
+    if IDEMPOTENCY_DERIVE_KEYS:
+        return derived_key(route, form_data)
+    return None
+
+def lease_time():
+    """Now, at the millisecond precision Mongo stores, so a lease can be matched exactly."""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def claim_doc(key, form_data, now=None):
+    now = now or lease_time()
+    return {
+        "_id": key,
+        "status": "pending",
+        "fingerprint": fingerprint(form_data),
+        "response": None,
+        "claimed_at": now,
+        "created_at": now
+    }
+
+def lease_expired(existing, now=None):
+    now = now or datetime.now(timezone.utc)
+    claimed_at = existing.get("claimed_at") or existing["created_at"]
+    if claimed_at.tzinfo is None:
+        claimed_at = claimed_at.replace(tzinfo=timezone.utc)
+    return now - claimed_at >= timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+
+def stale_claim(existing, now=None):
+    """
+    Filter matching `existing` only while it is still pending with the same,
+    expired lease (None if the lease hasn't run out): of several retries
+    taking it over, exactly one matches.
+    """
+    if existing["status"] != "pending" or not lease_expired(existing, now):
+        return None
+    # claimed_at None also matches claims stored before leases existed
+    return {"_id": existing["_id"], "status": "pending", "claimed_at": existing.get("claimed_at")}
+
+def replay(existing, form_data):
+    """The stored response for a repeated key, or None while the original is still running."""
+    if existing["fingerprint"] != fingerprint(form_data):
+        raise IdempotencyConflict("Idempotency-Key was already used for a different request", 422)
+    if existing["status"] == "done":
+        return existing["response"]
+    if existing["status"] == "stored" and lease_expired(existing):
+        return existing["response"]   # the original stored its feedback, then crashed
+    return None
@@ -0,0 +1,219 @@
+import sys
+import argparse
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from backend.analysis_cache import CACHE_TTL_SECONDS
+from backend.idempotency import IDEMPOTENCY_TTL_SECONDS
+from backend.near_duplicate import NEAR_DUP_TTL_DAYS
+
+# --------------------------------------------------
+# Declared Indexes (one place; create_indexes is a no-op when they exist)
+# --------------------------------------------------
+FEEDBACK_INDEXES = [
+    IndexModel([("batch_id", ASCENDING)]),                                  # worker: a batch's feedbacks
+    # admin: newest first, keyset paged on (created_at, _id)
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("location.district", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("ai.category", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("location.district", ASCENDING), ("ai.category", ASCENDING),
+                ("created_at", DESCENDING), ("_id", DESCENDING)]),                  # department officer
+    IndexModel([("ai.issue_key", ASCENDING)]),                              # cluster merge relabels
+]
+
+BATCH_INDEXES = [
+    # At most one collecting batch per constituency: concurrent upserts
+    # that both miss collide here instead of opening two batches
+    IndexModel(
+        [("district", ASCENDING), ("constituency", ASCENDING)],
+        unique=True, partialFilterExpression={"status": "collecting"}, name="one_collecting_batch"
+    ),
+    IndexModel([("batch_id", ASCENDING)], unique=True),
+    IndexModel([("status", ASCENDING), ("flush_at", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("completed_at", DESCENDING)]),
+]
+
+GLOBAL_ISSUE_INDEXES = [
+    IndexModel([("issue_key", ASCENDING)], unique=True),
+    # admin: top issues per scope, already in rank order
+    IndexModel([("priority_rank", DESCENDING), ("total_reports", DESCENDING)]),
+    IndexModel([("category", ASCENDING), ("priority_rank", DESCENDING), ("total_reports", DESCENDING)]),
+]
+
+ISSUE_DISTRICT_INDEXES = [
+    # One counter per issue and district: a retried chunk's upsert collides here
+    IndexModel([("issue_key", ASCENDING), ("district", ASCENDING)], unique=True, name="issue_district_key"),
+    IndexModel([("district", ASCENDING), ("category", ASCENDING)]),     # admin: a scope's counters
+]
+
+REPORTER_INDEXES = [
+    IndexModel([("issue_key", ASCENDING), ("count", ASCENDING)]),           # open bucket upsert
+    IndexModel([("issue_key", ASCENDING), ("_id", DESCENDING)]),            # newest-first paging
+]
+
+ROLLUP_INDEXES = [
+    # One counter per key: concurrent first increments of a key upsert it once
+    IndexModel(
+        [("district", ASCENDING), ("constituency", ASCENDING), ("category", ASCENDING),
+         ("priority", ASCENDING), ("day", ASCENDING)],
+        unique=True, name="rollup_key"
+    ),
+    IndexModel([("category", ASCENDING)]),
+]
+
+USER_INDEXES = [
+    IndexModel([("username", ASCENDING)], unique=True),
+    IndexModel([("role", ASCENDING)]),
+]
+
+JOB_INDEXES = [
+    IndexModel([("status", ASCENDING), ("available_at", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+    IndexModel([("key", ASCENDING)], unique=True, partialFilterExpression={"key": {"$type": "string"}}),
+]
+
+ISSUE_CLUSTER_INDEXES = [
+    IndexModel([("scope", ASCENDING), ("updated_at", ASCENDING)]),
+]
+
+ANALYSIS_CACHE_INDEXES = [
+    IndexModel([("created_at", ASCENDING)], expireAfterSeconds=CACHE_TTL_SECONDS),
+]
+
+NEAR_DUPLICATE_INDEXES = [
+    IndexModel([("created_at", ASCENDING)], expireAfterSeconds=NEAR_DUP_TTL_DAYS * 24 * 3600),
+]
+
+IDEMPOTENCY_INDEXES = [
+    IndexModel([("created_at", ASCENDING)], expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+]
+
+INDEXES = {
+    "feedbacks": FEEDBACK_INDEXES,
+    "batches": BATCH_INDEXES,
+    "global_issues": GLOBAL_ISSUE_INDEXES,
+    "issue_districts": ISSUE_DISTRICT_INDEXES,
+    "issue_reporters": REPORTER_INDEXES,
+    "feedback_rollups": ROLLUP_INDEXES,
+    "users": USER_INDEXES,
+    "analysis_jobs": JOB_INDEXES,
+    "issue_clusters": ISSUE_CLUSTER_INDEXES,
+    "analysis_cache": ANALYSIS_CACHE_INDEXES,
+    "near_duplicate_index": NEAR_DUPLICATE_INDEXES,
+    "idempotency_keys": IDEMPOTENCY_INDEXES,
+}
+
+
+def bootstrap_indexes(db, collections=None):
+    """
+    Creates every declared index (idempotent). Returns {collection: error}
+    for collections that failed, e.g. a unique index over duplicate data;
+    the remaining collections are still indexed.
+    """
+    failures = {}
+    for name, models in INDEXES.items():
+        if collections and name not in collections:
+            continue
+        try:
+            db[name].create_indexes(models)
+        except PyMongoError as e:
+            failures[name] = str(e)
+            print(f"⚠️ Index bootstrap failed for {name}: {e}")
+    return failures
+
+
+# --------------------------------------------------
+# Query-Plan Verification
+# --------------------------------------------------
+def hot_queries():
+    """(collection, label, filter, sort) for every query on a hot path."""
+    now = datetime.now(timezone.utc)
+    page = [("created_at", DESCENDING), ("_id", DESCENDING)]
+    ranked = [("priority_rank", DESCENDING), ("total_reports", DESCENDING)]
+    return [
+        ("batches", "allocate slot", {"district": "D", "constituency": "C", "status": "collecting"}, None),
+        ("batches", "batch by id", {"batch_id": "x"}, None),
+        ("batches", "due flushes", {"status": "collecting", "flush_at": {"$lte": now}}, None),
+        ("batches", "stuck batches", {"status": {"$in": ["queued", "processing"]}}, None),
+        ("batches", "latency metrics", {"status": "completed", "completed_at": {"$gte": now}},
+         [("completed_at", DESCENDING)]),
+        ("feedbacks", "batch to count", {"batch_id": "x", "accounted_batch": {"$exists": False}}, None),
+        ("feedbacks", "admin: all, newest first", {}, page),
+        ("feedbacks", "admin: districts", {"location.district": {"$in": ["D"]}}, page),
+        ("feedbacks", "admin: category", {"ai.category": "Water"}, page),
+        ("feedbacks", "admin: district + category", {"location.district": {"$in": ["D"]}, "ai.category": "Water"}, page),
+        ("feedbacks", "admin: next page", {"location.district": {"$in": ["D"]}, "$or": [
+            {"created_at": {"$lt": now}}, {"created_at": now, "_id": {"$lt": ObjectId()}}
+        ]}, page),
+        ("feedbacks", "cluster relabel", {"ai.issue_key": "k"}, None),
+        ("global_issues", "issue by key", {"issue_key": "k"}, None),
+        ("global_issues", "issues by keys", {"issue_key": {"$in": ["k1", "k2"]}}, None),
+        ("global_issues", "top issues: statewide", {}, ranked),
+        ("global_issues", "top issues: statewide dept", {"category": "Water"}, ranked),
+        ("issue_districts", "top issues: districts", {"district": {"$in": ["D"]}}, None),
+        ("issue_districts", "top issues: department", {"district": {"$in": ["D"]}, "category": "Water"}, None),
+        ("issue_districts", "counters of an issue", {"issue_key": "k"}, None),
+        ("issue_reporters", "open bucket", {"issue_key": "k", "count": {"$lt": 200}}, None),
+        ("issue_reporters", "reporters page", {"issue_key": "k"}, [("_id", DESCENDING)]),
+        ("feedback_rollups", "dashboard: districts", {"district": {"$in": ["D"]}}, None),
+        ("feedback_rollups", "dashboard: department", {"category": "Water"}, None),
+        ("users", "login", {"username": "u"}, None),
+        ("users", "list admins", {"role": "admin"}, None),
+        ("analysis_jobs", "claim", {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$lt": 5}}
+        ]}, [("available_at", ASCENDING)]),
+        ("analysis_jobs", "job by key", {"key": {"$in": ["analyze_batch:x"]}}, None),
+        ("issue_clusters", "cluster refresh", {"scope": "s", "updated_at": {"$gt": now}}, None),
+        ("analysis_cache", "cache lookup", {"_id": {"$in": ["k"]}}, None),
+    ]
+
+def plan_stages(plan):
+    """Every stage name in an explain() winning plan tree."""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [s for s in stages if s]
+
+def verify_query_plans(db):
+    """Runs explain() on every hot query; returns [(collection, label, stages)] that COLLSCAN."""
+    offenders = []
+    for name, label, query, sort in hot_queries():
+        cursor = db[name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = plan_stages(winning)
+        if "COLLSCAN" in stages:
+            offenders.append((name, label, stages))
+        print(f"{'❌' if 'COLLSCAN' in stages else '✅'} {name:<15} {label:<26} {' <- '.join(stages)}")
+    return offenders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create the declared MongoDB indexes (idempotent)")
+    parser.add_argument("--verify", action="store_true",
+                        help="also explain() every hot query and fail on a collection scan")
+    parser.add_argument("--collection", action="append", help="only these collections (repeatable)")
+    args = parser.parse_args(argv)
+
+    from backend.db import db
+    failures = bootstrap_indexes(db, args.collection)
+    targets = [name for name in INDEXES if not args.collection or name in args.collection]
+    print(f"📇 Indexes applied to {len(targets) - len(failures)} collections"
+          + (f", {len(failures)} failed" if failures else ""))
+
+    offenders = verify_query_plans(db) if args.verify else []
+    if offenders:
+        print(f"❌ {len(offenders)} hot queries collection-scan")
+    return 1 if failures or offenders else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+import os
+import threading
+from uuid import uuid4
+from collections import Counter
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+from backend.near_duplicate import MinHasher, WORD_PATTERN
+
+load_dotenv()
+
+# Tunables (override through .env)
+CLUSTER_THRESHOLD = float(os.getenv("ISSUE_CLUSTER_THRESHOLD", "0.3"))
+CLUSTER_MERGE_THRESHOLD = float(os.getenv("ISSUE_CLUSTER_MERGE_THRESHOLD", "0.6"))
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "in", "on", "at", "of", "to", "for", "and", "or",
+    "our", "my", "we", "i", "it", "this", "that", "there", "very", "not", "no", "since",
+    "area", "please", "sir", "from", "with", "be", "has", "have", "all", "any", "issue",
+    "problem", "reported", "near", "here", "daily", "people"
+}
+TOP_TERMS = 25          # terms that make up a cluster's centroid
+MAX_TERM_COUNTS = 200   # per-cluster vocabulary kept in term_counts
+MAX_SAMPLES = 24        # recent members kept for split checks
+SPLIT_EVERY = 25        # re-check cohesion every N new members
+SPLIT_COHESION = 0.2    # mean member/centroid similarity below this -> try to split
+
+
+def legacy_issue_key(category, main_issue):
+    """Pre-clustering key: one issue per (category, fixed main_issue text)."""
+    return f"{category}_{main_issue}".replace(" ", "_").lower()
+
+def issue_key_for(ai):
+    return ai.get("issue_key") or legacy_issue_key(
+        ai.get("category", "Other"), ai.get("main_issue", "General Issue")
+    )
+
+def issue_terms(text):
+    return {
+        w for w in WORD_PATTERN.findall((text or "").lower())
+        if len(w) > 1 and w not in STOPWORDS and not w.isdigit()
+    }
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# --------------------------------------------------
+# Incremental Issue Clustering
+# --------------------------------------------------
+class IssueClusterer:
+    """
+    Assigns each feedback to the nearest issue cluster of its scope
+    (district + constituency + category), or opens a new cluster.
+
+    Each cluster keeps a term-count centroid. Its top terms are MinHashed
+    and LSH-indexed per scope, so assignment only compares against the few
+    clusters sharing a band instead of every issue. Clusters whose centroids
+    converge are merged; clusters whose recent members drift apart are
+    split. Both are returned as events so callers can move their reports.
+    """
+
+    def __init__(self, collection=None, threshold=CLUSTER_THRESHOLD,
+                 merge_threshold=CLUSTER_MERGE_THRESHOLD, num_perm=32, bands=16):
+        self.collection = collection
+        self.threshold = threshold
+        self.merge_threshold = merge_threshold
+        self.hasher = MinHasher(num_perm, seed=11)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self._scopes = {}   # scope -> {"clusters": {id: doc}, "buckets": {}, "seen": datetime}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def scope_key(district, constituency, category):
+        return f"{district}|{constituency}|{category}"
+
+    # ---------------- CENTROIDS + LSH ----------------
+    @staticmethod
+    def centroid(cluster):
+        counts = cluster["term_counts"]
+        return set(sorted(counts, key=lambda t: (-counts[t], t))[:TOP_TERMS])
+
+    def _band_keys(self, terms):
+        sig = self.hasher.signature_of(terms).tolist()
+        return [(band, tuple(sig[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    def _index(self, state, cluster):
+        keys = self._band_keys(self.centroid(cluster))
+        cluster["_bands"] = keys
+        for key in keys:
+            state["buckets"].setdefault(key, set()).add(cluster["_id"])
+
+    def _unindex(self, state, cluster):
+        for key in cluster.pop("_bands", []):
+            bucket = state["buckets"].get(key)
+            if bucket:
+                bucket.discard(cluster["_id"])
+
+    def _candidates(self, state, terms, exclude=None):
+        found = set()
+        for key in self._band_keys(terms):
+            found.update(state["buckets"].get(key, ()))
+        found.discard(exclude)
+        return [state["clusters"][cid] for cid in found if cid in state["clusters"]]
+
+    # ---------------- PERSISTENCE ----------------
+    def _state(self, scope):
+        state = self._scopes.get(scope)
+        if state is None:
+            state = self._scopes[scope] = {"clusters": {}, "buckets": {}, "seen": None}
+        return state
+
+    def refresh(self, scopes):
+        """Pulls clusters changed by other processes since this one last looked."""
+        if self.collection is None:
+            return
+        with self._lock:
+            for scope in set(scopes):
+                state = self._state(scope)
+                query = {"scope": scope}
+                if state["seen"] is not None:
+                    query["updated_at"] = {"$gt": state["seen"]}
+                try:
+                    for doc in self.collection.find(query):
+                        old = state["clusters"].pop(doc["_id"], None)
+                        if old:
+                            self._unindex(state, old)
+                        if doc.get("merged_into"):
+                            continue
+                        state["clusters"][doc["_id"]] = doc
+                        self._index(state, doc)
+                        if state["seen"] is None or doc["updated_at"] > state["seen"]:
+                            state["seen"] = doc["updated_at"]
+                except PyMongoError as e:
+                    print(f"⚠️ Issue cluster refresh failed: {e}")
+
+    def _save(self, cluster):
+        """Whole-document write, for merges and splits (rare, and they restructure the cluster)."""
+        cluster["updated_at"] = datetime.now(timezone.utc)
+        if self.collection is None:
+            return
+        doc = {k: v for k, v in cluster.items() if not k.startswith("_")}
+        try:
+            self.collection.update_one({"_id": cluster["_id"]}, {"$set": doc}, upsert=True)
+        except PyMongoError as e:
+            print(f"⚠️ Issue cluster write failed: {e}")
+
+    def _save_member(self, state, cluster, feedback_id, terms):
+        """
+        Persists one new member with $inc / $push, so workers adding to the same
+        cluster don't overwrite each other, then adopts the counts other
+        processes added meanwhile.
+        """
+        now = cluster["updated_at"] = datetime.now(timezone.utc)
+        if self.collection is None:
+            return
+        static = ("scope", "district", "constituency", "category", "label", "merged_into", "created_at")
+        try:
+            doc = self.collection.find_one_and_update(
+                {"_id": cluster["_id"]},
+                {
+                    "$inc": {"size": 1, **{f"term_counts.{t}": 1 for t in terms}},
+                    "$push": {"samples": {
+                        "$each": [{"id": feedback_id, "terms": sorted(terms)}], "$slice": -MAX_SAMPLES
+                    }},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {k: cluster[k] for k in static}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError as e:
+            print(f"⚠️ Issue cluster write failed: {e}")
+            return
+
+        self._unindex(state, cluster)
+        counts = Counter(doc.get("term_counts", {}))
+        cluster["term_counts"] = dict(counts.most_common(MAX_TERM_COUNTS))
+        cluster["size"] = doc["size"]
+        cluster["samples"] = doc.get("samples", [])
+        self._index(state, cluster)
+
+        # $inc only ever adds terms: trim the stored vocabulary's tail now and then
+        if len(counts) > MAX_TERM_COUNTS + MAX_TERM_COUNTS // 4:
+            tail = [t for t, _ in counts.most_common()[MAX_TERM_COUNTS:]]
+            try:
+                self.collection.update_one(
+                    {"_id": cluster["_id"]}, {"$unset": {f"term_counts.{t}": "" for t in tail}}
+                )
+            except PyMongoError as e:
+                print(f"⚠️ Issue cluster trim failed: {e}")
+
+    # ---------------- ASSIGNMENT ----------------
+    def assign(self, feedback_id, text, district, constituency, category, label):
+        """
+        Returns (cluster_id, events). Events are ("merge", source_id, target_id)
+        and ("split", source_id, new_id, moved_feedback_ids, moved_fraction).
+        """
+        scope = self.scope_key(district, constituency, category)
+        terms = issue_terms(text) or issue_terms(label)
+
+        with self._lock:
+            state = self._state(scope)
+            best, best_sim = None, 0.0
+            for cluster in self._candidates(state, terms):
+                sim = jaccard(terms, self.centroid(cluster))
+                if sim > best_sim:
+                    best, best_sim = cluster, sim
+
+            if best is None or best_sim < self.threshold:
+                best = self._new_cluster(scope, district, constituency, category, label)
+                state["clusters"][best["_id"]] = best
+            else:
+                self._unindex(state, best)
+
+            self._add_member(best, feedback_id, terms)
+            self._index(state, best)
+
+            events = []
+            if best["size"] % SPLIT_EVERY == 0:
+                events.extend(self._maybe_split(state, best))
+            events.extend(self._maybe_merge(state, best))
+
+            if events:
+                self._save(best)
+            else:
+                self._save_member(state, best, feedback_id, terms)
+            return self._resolve(best["_id"], feedback_id, events), events
+
+    @staticmethod
+    def _resolve(cluster_id, feedback_id, events):
+        """Where the new member ended up after any split/merge it triggered."""
+        for event in events:
+            if event[0] == "split" and event[1] == cluster_id and feedback_id in event[3]:
+                cluster_id = event[2]
+            elif event[0] == "merge" and event[1] == cluster_id:
+                cluster_id = event[2]
+        return cluster_id
+
+    @staticmethod
+    def _new_cluster(scope, district, constituency, category, label):
+        now = datetime.now(timezone.utc)
+        return {
+            "_id": str(uuid4()),
+            "scope": scope,
+            "district": district,
+            "constituency": constituency,
+            "category": category,
+            "label": label,
+            "size": 0,
+            "term_counts": {},
+            "samples": [],
+            "merged_into": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+    @staticmethod
+    def _add_member(cluster, feedback_id, terms):
+        counts = Counter(cluster["term_counts"])
+        counts.update(terms)
+        cluster["term_counts"] = dict(counts.most_common(MAX_TERM_COUNTS))
+        cluster["size"] += 1
+        cluster["samples"] = (cluster["samples"] + [{"id": feedback_id, "terms": sorted(terms)}])[-MAX_SAMPLES:]
+
+    def keywords(self, cluster_id, scope, limit=5):
+        cluster = self._scopes.get(scope, {}).get("clusters", {}).get(cluster_id)
+        if not cluster:
+            return []
+        counts = cluster["term_counts"]
+        return sorted(counts, key=lambda t: (-counts[t], t))[:limit]
+
+    # ---------------- MERGE ----------------
+    def _maybe_merge(self, state, cluster):
+        events = []
+        centroid = self.centroid(cluster)
+        for other in self._candidates(state, centroid, exclude=cluster["_id"]):
+            if jaccard(centroid, self.centroid(other)) < self.merge_threshold:
+                continue
+
+            target, source = (cluster, other) if cluster["size"] >= other["size"] else (other, cluster)
+            self._unindex(state, target)
+            self._unindex(state, source)
+
+            counts = Counter(target["term_counts"])
+            counts.update(source["term_counts"])
+            target["term_counts"] = dict(counts.most_common(MAX_TERM_COUNTS))
+            target["size"] += source["size"]
+            target["samples"] = (target["samples"] + source["samples"])[-MAX_SAMPLES:]
+
+            source["merged_into"] = target["_id"]
+            del state["clusters"][source["_id"]]
+            self._index(state, target)
+            self._save(source)
+            self._save(target)
+
+            events.append(("merge", source["_id"], target["_id"]))
+            if source is cluster:
+                break
+            centroid = self.centroid(cluster)
+        return events
+
+    # ---------------- SPLIT ----------------
+    def _maybe_split(self, state, cluster):
+        samples = [s for s in cluster["samples"] if s["terms"]]
+        if len(samples) < 8:
+            return []
+
+        centroid = self.centroid(cluster)
+        sets = [set(s["terms"]) for s in samples]
+        if sum(jaccard(t, centroid) for t in sets) / len(sets) >= SPLIT_COHESION:
+            return []
+
+        # Two seeds: the member furthest from the centroid, then the one furthest from it
+        seed_a = min(range(len(sets)), key=lambda i: jaccard(sets[i], centroid))
+        seed_b = min(range(len(sets)), key=lambda i: jaccard(sets[i], sets[seed_a]))
+        group_b = [i for i in range(len(sets)) if jaccard(sets[i], sets[seed_b]) > jaccard(sets[i], sets[seed_a])]
+        moved = set(group_b)
+
+        if not (len(sets) // 4 <= len(group_b) <= len(sets) - len(sets) // 4):
+            return []
+
+        moved_terms = Counter()
+        for i in group_b:
+            moved_terms.update(sets[i])
+        fraction = len(group_b) / len(sets)
+
+        new_cluster = self._new_cluster(
+            cluster["scope"], cluster["district"], cluster["constituency"],
+            cluster["category"], cluster["label"]
+        )
+        new_cluster["term_counts"] = dict(moved_terms.most_common(MAX_TERM_COUNTS))
+        new_cluster["size"] = max(1, round(cluster["size"] * fraction))
+        new_cluster["samples"] = [samples[i] for i in group_b]
+
+        self._unindex(state, cluster)
+        remaining = Counter(cluster["term_counts"])
+        remaining.subtract(moved_terms)
+        cluster["term_counts"] = {t: c for t, c in remaining.most_common(MAX_TERM_COUNTS) if c > 0}
+        cluster["size"] -= new_cluster["size"]
+        cluster["samples"] = [s for i, s in enumerate(samples) if i not in moved]
+        self._index(state, cluster)
+
+        state["clusters"][new_cluster["_id"]] = new_cluster
+        self._index(state, new_cluster)
+        self._save(new_cluster)
+
+        moved_ids = [samples[i]["id"] for i in group_b if samples[i]["id"] is not None]
+        return [("split", cluster["_id"], new_cluster["_id"], moved_ids, fraction)]
+
+
+# --------------------------------------------------
+# Helpers for collections that store a cluster id per feedback
+# --------------------------------------------------
+def relabel_feedbacks(collection, events, field):
+    """Applies merge/split events to feedback docs holding the cluster id in `field`."""
+    for event in events:
+        if event[0] == "merge":
+            collection.update_many({field: event[1]}, {"$set": {field: event[2]}})
+        elif event[0] == "split" and event[3]:
+            collection.update_many({"_id": {"$in": event[3]}}, {"$set": {field: event[2]}})
@@ -0,0 +1,172 @@
+import os
+import random
+from datetime import datetime, timezone, timedelta
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from dotenv import load_dotenv
+
+from backend.indexes import JOB_INDEXES
+
+load_dotenv()
+
+# Tunables (override through .env)
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+
+# --------------------------------------------------
+# Mongo-backed Job Queue
+# --------------------------------------------------
+class JobQueue:
+    """
+    Durable work queue on a Mongo collection.
+
+    A worker claims a job atomically and holds it under a lease
+    (`lease_until`), which it extends with `heartbeat()` while working.
+    A job whose lease runs out (worker crashed or hung) becomes claimable
+    again, so abandoned work is recovered without any sweeper. Failures are
+    retried with exponential backoff up to `max_attempts`, then parked as
+    "failed". A `key` makes enqueueing idempotent (one job per batch).
+    """
+
+    def __init__(self, collection, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS,
+                 retry_base_seconds=5, retry_cap_seconds=300):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_cap_seconds = retry_cap_seconds
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if self._index_ready:
+            return
+        self.collection.create_indexes(JOB_INDEXES)
+        self._index_ready = True
+
+    # ---------------- PRODUCER ----------------
+    @staticmethod
+    def new_job(kind, payload, delay_seconds=0):
+        now = datetime.now(timezone.utc)
+        return {
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "available_at": now + timedelta(seconds=delay_seconds),
+            "lease_until": None,
+            "worker": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+    def enqueue(self, kind, payload, key=None, delay_seconds=0):
+        """Adds a job; with `key`, a second enqueue of the same key is a no-op."""
+        self.ensure_indexes()
+        job = self.new_job(kind, payload, delay_seconds)
+        if key is None:
+            return self.collection.insert_one(job).inserted_id
+
+        job["key"] = key
+        try:
+            doc = self.collection.find_one_and_update(
+                {"key": key},
+                {"$setOnInsert": job},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost an upsert race with another producer: the job exists
+            doc = self.collection.find_one({"key": key})
+        return doc["_id"]
+
+    # ---------------- WORKER ----------------
+    def claim(self, worker_id, kinds=None):
+        """Leases the oldest runnable job (queued, or abandoned past its lease)."""
+        self.ensure_indexes()
+        now = datetime.now(timezone.utc)
+        query = {
+            "$or": [
+                {"status": "queued", "available_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$lt": self.max_attempts}}
+            ]
+        }
+        if kinds:
+            query["kind"] = {"$in": list(kinds)}
+
+        return self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": worker_id,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def heartbeat(self, job, worker_id):
+        """Extends the lease. False means the lease was lost to another worker."""
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_one(
+            {"_id": job["_id"], "status": "running", "worker": worker_id},
+            {"$set": {"lease_until": now + timedelta(seconds=self.lease_seconds), "updated_at": now}}
+        )
+        return result.matched_count == 1
+
+    def complete(self, job, worker_id):
+        now = datetime.now(timezone.utc)
+        self.collection.update_one(
+            {"_id": job["_id"], "worker": worker_id},
+            {"$set": {"status": "done", "lease_until": None, "finished_at": now, "updated_at": now}}
+        )
+
+    def fail(self, job, worker_id, error):
+        """Schedules a retry with backoff, or parks the job once attempts run out."""
+        now = datetime.now(timezone.utc)
+        update = {"lease_until": None, "last_error": str(error)[:500], "updated_at": now}
+        if job["attempts"] >= self.max_attempts:
+            update.update({"status": "failed", "finished_at": now})
+        else:
+            delay = min(self.retry_cap_seconds, self.retry_base_seconds * (2 ** (job["attempts"] - 1)))
+            delay *= 0.5 + random.random() / 2
+            update.update({"status": "queued", "available_at": now + timedelta(seconds=delay)})
+
+        self.collection.update_one({"_id": job["_id"], "worker": worker_id}, {"$set": update})
+        return update["status"]
+
+    def reap(self):
+        """Parks jobs whose lease expired on their last allowed attempt; returns them."""
+        now = datetime.now(timezone.utc)
+        reaped = []
+        try:
+            while True:
+                job = self.collection.find_one_and_update(
+                    {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+                    {"$set": {
+                        "status": "failed",
+                        "last_error": "lease expired on final attempt",
+                        "finished_at": now,
+                        "updated_at": now
+                    }},
+                    return_document=ReturnDocument.AFTER
+                )
+                if not job:
+                    return reaped
+                reaped.append(job)
+        except PyMongoError as e:
+            print(f"⚠️ Job reaping failed: {e}")
+            return reaped
+
+    def stats(self):
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
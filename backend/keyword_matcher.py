@@ -0,0 +1,77 @@
+from collections import deque
+
+
+# =========================
+# AHO-CORASICK KEYWORD MATCHER
+# =========================
+class KeywordMatcher:
+    """
+    Finds every keyword of several tagged keyword tables in one pass.
+
+    `tables` maps a tag (e.g. ("category", "Water")) to a list of keywords.
+    Matching is plain substring matching, same as `word in text_lower`,
+    so overlapping keywords ("seri illa" / "illa") are all reported.
+    """
+
+    def __init__(self, tables):
+        self.tables = {tag: list(words) for tag, words in tables.items()}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        tags_by_word = {}
+        for tag, words in self.tables.items():
+            for word in words:
+                tags_by_word.setdefault(word.lower(), []).append(tag)
+
+        for word in tags_by_word:
+            self._add(word)
+        self._link()
+        self.tags_by_word = {w: tuple(t) for w, t in tags_by_word.items()}
+
+    def _add(self, word):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = (word,)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Returns the set of keywords present in `text` (lowercased)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def scan(self, text):
+        """Returns {tag: set of matched keywords} for every tag with a hit."""
+        hits = {}
+        for word in self.find(text):
+            for tag in self.tags_by_word[word]:
+                hits.setdefault(tag, set()).add(word)
+        return hits
@@ -0,0 +1,188 @@
+import os
+import json
+import random
+import asyncio
+from dotenv import load_dotenv
+from openai import (
+    AsyncOpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+)
+
+load_dotenv()
+
+# Tunables (override through .env)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_PACK_SIZE = int(os.getenv("LLM_PACK_SIZE", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", "30"))
+
+RETRYABLE_ERRORS = (
+    RateLimitError, APITimeoutError, APIConnectionError, InternalServerError, asyncio.TimeoutError
+)
+
+
+# ---------------- PROMPTS ----------------
+SYSTEM_PROMPT = """
+You are an AI feedback analysis system.
+Return ONLY valid JSON.
+Classify emotion as one of:
+frustration, anger, confusion, concern, neutral, satisfaction.
+"""
+
+RESULT_TEMPLATE = """{
+  "summary": "...",
+  "main_issue": "...",
+  "category": "Technical / Political / Privacy / Payment / Security / Policy / Other",
+  "issues": [
+    {
+      "problem": "...",
+      "area": "Frontend / Backend / Security / Policy / Network"
+    }
+  ],
+  "emotion": "...",
+  "confidence": "high / medium / low"
+}"""
+
+PACKED_MARKER = "Messages (JSON array):"
+
+def build_single_messages(feedback_text):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"\n{RESULT_TEMPLATE}\n\nMessage:\n{feedback_text}\n"}
+    ]
+
+def build_packed_messages(feedback_texts):
+    items = [{"id": i, "text": text} for i, text in enumerate(feedback_texts)]
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "Analyze every message below independently.\n"
+                'Return {"results": [...]} with exactly one object per message, '
+                'in the same order, each with its "id" plus these fields:\n'
+                f"{RESULT_TEMPLATE}\n\n"
+                f"{PACKED_MARKER}\n{json.dumps(items, ensure_ascii=False)}\n"
+            )
+        }
+    ]
+
+
+# --------------------------------------------------
+# Async Analysis Client
+# --------------------------------------------------
+class AsyncFeedbackAnalyzer:
+    """
+    Concurrent LLM analysis:
+      * at most `max_concurrency` requests in flight (semaphore)
+      * `pack_size` feedbacks per prompt, answered as one JSON array
+      * exponential backoff with jitter on rate limits / transient errors
+      * a hard per-call deadline (`deadline` seconds per attempt)
+
+    `base_url` points it at any OpenAI-compatible server, e.g. the local
+    stand-in in benchmarks/fake_openai_server.py.
+    """
+
+    def __init__(self, client=None, model=LLM_MODEL, max_concurrency=LLM_MAX_CONCURRENCY,
+                 pack_size=LLM_PACK_SIZE, max_retries=LLM_MAX_RETRIES,
+                 deadline=LLM_CALL_DEADLINE, base_url=None, backoff_base=0.5, backoff_cap=20.0):
+        self.client = client or AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY") or "not-needed-for-local",
+            base_url=base_url,
+            max_retries=0  # retries are handled here, with our own budget
+        )
+        self.model = model
+        self.pack_size = max(1, pack_size)
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.counters = {"calls": 0, "retries": 0, "rate_limited": 0, "unpacked_fallbacks": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.close()
+
+    # ---------------- LOW LEVEL ----------------
+    def _backoff_delay(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        delay = delay * (0.5 + random.random() / 2)
+        return max(delay, retry_after or 0.0)
+
+    async def _complete(self, messages):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    self.counters["calls"] += 1
+                    response = await asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            temperature=0,
+                            response_format={"type": "json_object"}
+                        ),
+                        timeout=self.deadline
+                    )
+                return json.loads(response.choices[0].message.content)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                if isinstance(e, RateLimitError):
+                    self.counters["rate_limited"] += 1
+                self.counters["retries"] += 1
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+
+    # ---------------- PUBLIC API ----------------
+    async def analyze_one(self, feedback_text):
+        return await self._complete(build_single_messages(feedback_text))
+
+    async def _analyze_pack(self, feedback_texts):
+        if len(feedback_texts) == 1:
+            return [await self.analyze_one(feedback_texts[0])]
+
+        data = await self._complete(build_packed_messages(feedback_texts))
+        results = data.get("results") if isinstance(data, dict) else None
+
+        if isinstance(results, list) and len(results) == len(feedback_texts):
+            by_id = {r.get("id"): r for r in results if isinstance(r, dict)}
+            if set(by_id) == set(range(len(feedback_texts))):
+                return [{k: v for k, v in by_id[i].items() if k != "id"} for i in range(len(feedback_texts))]
+
+        # Model didn't return one object per message: ask one by one
+        self.counters["unpacked_fallbacks"] += 1
+        return list(await asyncio.gather(*(self.analyze_one(t) for t in feedback_texts)))
+
+    async def analyze_many(self, feedback_texts):
+        """Analyses in input order; packs and requests run concurrently."""
+        packs = [
+            feedback_texts[start:start + self.pack_size]
+            for start in range(0, len(feedback_texts), self.pack_size)
+        ]
+        pack_results = await asyncio.gather(*(self._analyze_pack(p) for p in packs))
+        return [result for pack in pack_results for result in pack]
+
+
+# --------------------------------------------------
+# Sync Shim (Streamlit / scripts)
+# --------------------------------------------------
+def analyze_texts(feedback_texts, **analyzer_options):
+    """
+    Blocking wrapper for callers without an event loop. A fresh client is
+    opened per call because async HTTP pools are bound to their event loop.
+    """
+    async def run():
+        async with AsyncFeedbackAnalyzer(**analyzer_options) as analyzer:
+            return await analyzer.analyze_many(feedback_texts)
+
+    return asyncio.run(run())
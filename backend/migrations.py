@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+
+
+# --------------------------------------------------
+# One-off Data Migrations
+# --------------------------------------------------
+# Each migration is recorded in the `migrations` collection once it has
+# run, so a bootstrap repeats none of them. Migrations must be idempotent:
+# two processes starting together may both run one.
+
+def run_once(migrations, name, migrate):
+    """migrate()'s result, or None if `name` has already run."""
+    if migrations.find_one({"_id": name}, {"_id": 1}):
+        return None
+    result = migrate()
+    migrations.update_one(
+        {"_id": name}, {"$set": {"done_at": datetime.now(timezone.utc), "result": result}}, upsert=True
+    )
+    return result
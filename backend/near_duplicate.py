@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Tunables (override through .env)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+NEAR_DUP_TTL_DAYS = int(os.getenv("NEAR_DUP_TTL_DAYS", "30"))
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "500000"))
+
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_PATTERN = re.compile(r"[\w\u0B80-\u0BFF]+")
+
+
+# --------------------------------------------------
+# Shingling + MinHash
+# --------------------------------------------------
+def shingles(text):
+    """Word unigrams + bigrams: robust to punctuation, tolerant to reordering."""
+    words = WORD_PATTERN.findall(text.lower())
+    grams = set(words)
+    grams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return grams
+
+def hash_shingle(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+class MinHasher:
+    def __init__(self, num_perm=64, seed=7):
+        rng = np.random.RandomState(seed)
+        # a < 2^31 and x < 2^32 keep a*x + b inside uint64 before the modulo
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text):
+        return self.signature_of(shingles(text))
+
+    def signature_of(self, grams):
+        if not grams:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        x = np.fromiter((hash_shingle(g) for g in grams), dtype=np.uint64, count=len(grams))
+        return ((np.outer(x, self.a) + self.b) % MERSENNE_PRIME).min(axis=0)
+
+
+# --------------------------------------------------
+# LSH Index
+# --------------------------------------------------
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of recent feedback texts.
+
+    Signatures are split into `bands`; texts sharing any band (within the
+    same `scope`, e.g. a constituency) become candidates and are confirmed
+    by estimated Jaccard similarity >= `threshold`. Entries are persisted to
+    `collection` (TTL-expired) so the index survives restarts, and other
+    processes' additions are picked up by an incremental `refresh()`.
+    """
+
+    def __init__(self, collection=None, num_perm=64, bands=16, threshold=NEAR_DUP_THRESHOLD,
+                 max_entries=NEAR_DUP_MAX_ENTRIES, ttl_days=NEAR_DUP_TTL_DAYS, refresh_seconds=30):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.collection = collection
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_days = ttl_days
+        self.refresh_seconds = refresh_seconds
+
+        self._entries = OrderedDict()   # doc_id -> (scope, signature)
+        self._buckets = {}              # (scope, band, values) -> set(doc_id)
+        self._lock = threading.Lock()
+        self._loaded_until = None
+        self._last_refresh = 0.0
+        self._index_ready = False
+
+    # ---------------- IN-MEMORY ----------------
+    def _band_keys(self, signature, scope):
+        sig = signature.tolist()
+        return [
+            (scope, band, tuple(sig[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _insert(self, doc_id, scope, signature):
+        with self._lock:
+            if doc_id in self._entries:
+                return
+            self._entries[doc_id] = (scope, signature)
+            for key in self._band_keys(signature, scope):
+                self._buckets.setdefault(key, set()).add(doc_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, (old_scope, old_sig) = self._entries.popitem(last=False)
+                for key in self._band_keys(old_sig, old_scope):
+                    bucket = self._buckets.get(key)
+                    if bucket:
+                        bucket.discard(old_id)
+                        if not bucket:
+                            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---------------- PERSISTENCE ----------------
+    def ensure_index(self):
+        if self._index_ready or self.collection is None:
+            return
+        self.collection.create_index("created_at", expireAfterSeconds=self.ttl_days * 24 * 3600)
+        self._index_ready = True
+
+    def refresh(self, force=False):
+        """Loads entries persisted since the last load (all of them the first time)."""
+        if self.collection is None:
+            return
+        first_load = self._loaded_until is None and not self._last_refresh
+        if not (force or first_load) and time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+        self._last_refresh = time.monotonic()
+
+        since = self._loaded_until or datetime.now(timezone.utc) - timedelta(days=self.ttl_days)
+        try:
+            cursor = self.collection.find(
+                {"created_at": {"$gt": since}}, {"scope": 1, "sig": 1, "created_at": 1}
+            ).sort("created_at", 1)
+            for doc in cursor:
+                self._insert(doc["_id"], doc.get("scope"), np.array(doc["sig"], dtype=np.uint64))
+                self._loaded_until = doc["created_at"]
+        except PyMongoError as e:
+            print(f"⚠️ Near-duplicate index refresh failed: {e}")
+
+    # ---------------- PUBLIC API ----------------
+    def signature(self, text):
+        return self.hasher.signature(text)
+
+    def query(self, text, scope=None, signature=None):
+        """Returns (doc_id, similarity) of the closest near-duplicate, or None."""
+        self.refresh()
+        signature = self.signature(text) if signature is None else signature
+
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature, scope):
+                candidates.update(self._buckets.get(key, ()))
+            if not candidates:
+                return None
+            candidates = list(candidates)
+            matrix = np.stack([self._entries[doc_id][1] for doc_id in candidates])
+
+        # Estimated Jaccard = share of equal MinHash values, for all candidates at once
+        similarities = (matrix == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        return candidates[best], float(similarities[best])
+
+    def add(self, doc_id, text, scope=None, signature=None, persist=True):
+        signature = self.signature(text) if signature is None else signature
+        self._insert(doc_id, scope, signature)
+        if persist:
+            self.persist_many([(doc_id, scope, signature)])
+        return signature
+
+    @staticmethod
+    def persist_ops(entries):
+        now = datetime.now(timezone.utc)
+        return [
+            UpdateOne(
+                {"_id": doc_id},
+                {"$setOnInsert": {"scope": scope, "sig": [int(v) for v in signature], "created_at": now}},
+                upsert=True
+            )
+            for doc_id, scope, signature in entries
+        ]
+
+    def persist_many(self, entries):
+        """Stores (doc_id, scope, signature) entries in one unordered bulk write."""
+        if self.collection is None or not entries:
+            return
+        try:
+            self.ensure_index()
+            self.collection.bulk_write(self.persist_ops(entries), ordered=False)
+        except PyMongoError as e:
+            print(f"⚠️ Near-duplicate index write failed: {e}")
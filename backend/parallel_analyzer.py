@@ -0,0 +1,76 @@
+import os
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+from backend.ai_engine import analyze_feedback_batch
+
+load_dotenv()
+
+# Tunables (override through .env)
+AI_WORKERS = int(os.getenv("AI_WORKERS", os.cpu_count() or 1))
+AI_CHUNK_SIZE = int(os.getenv("AI_CHUNK_SIZE", "2000"))
+
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()  # worker.py shares the pool between threads
+
+
+# --------------------------------------------------
+# Worker Process Setup
+# --------------------------------------------------
+def _init_worker():
+    # Importing the engines compiles the keyword matcher and the bulk
+    # analyzer's matrices once per worker, not once per chunk.
+    import backend.ai_engine  # noqa: F401
+    import backend.bulk_analyzer  # noqa: F401
+
+def _analyze_chunk(texts):
+    return analyze_feedback_batch(texts, vectorized=True)
+
+def get_executor(workers=None):
+    global _executor, _executor_workers
+    workers = workers or AI_WORKERS
+
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            shutdown_executor()
+            _executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            _executor_workers = workers
+        return _executor
+
+def shutdown_executor():
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+    _executor_workers = None
+
+atexit.register(shutdown_executor)
+
+
+# --------------------------------------------------
+# Parallel Analysis
+# --------------------------------------------------
+def analyze_parallel(feedback_list, workers=None, chunk_size=None):
+    """
+    Splits `feedback_list` into chunks and analyzes them on a process pool.
+    Results come back in input order. Inputs that fit in a single chunk
+    (or workers=1) are analyzed in-process, skipping the IPC overhead.
+    """
+    workers = workers or AI_WORKERS
+    chunk_size = chunk_size or AI_CHUNK_SIZE
+
+    if workers <= 1 or len(feedback_list) <= chunk_size:
+        return analyze_feedback_batch(feedback_list)
+
+    chunks = [
+        feedback_list[start:start + chunk_size]
+        for start in range(0, len(feedback_list), chunk_size)
+    ]
+
+    results = []
+    for chunk_results in get_executor(workers).map(_analyze_chunk, chunks):
+        results.extend(chunk_results)
+    return results
@@ -0,0 +1,42 @@
+# --------------------------------------------------
+# Issue Priority
+# --------------------------------------------------
+# An issue's priority follows its report count. The write path stores it
+# on global issues; dashboards scoped to some districts rank the counts
+# of those districts with the same rule.
+
+PRIORITY_THRESHOLDS = [(20, "CRITICAL"), (10, "HIGH"), (5, "MEDIUM")]
+
+# Stored next to priority so "top issues" is an index-ordered query
+PRIORITY_RANKS = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
+
+def calculate_priority(count):
+    for threshold, priority in PRIORITY_THRESHOLDS:
+        if count >= threshold:
+            return priority
+    return "LOW"
+
+def priority_fields(count):
+    priority = calculate_priority(count)
+    return {"priority": priority, "priority_rank": PRIORITY_RANKS[priority]}
+
+# Same rule as calculate_priority, evaluated server-side on the stored total
+PRIORITY_EXPRESSION = {
+    "$switch": {
+        "branches": [
+            {"case": {"$gte": ["$total_reports", threshold]}, "then": priority}
+            for threshold, priority in PRIORITY_THRESHOLDS
+        ],
+        "default": "LOW"
+    }
+}
+
+PRIORITY_RANK_EXPRESSION = {
+    "$switch": {
+        "branches": [
+            {"case": {"$gte": ["$total_reports", threshold]}, "then": PRIORITY_RANKS[priority]}
+            for threshold, priority in PRIORITY_THRESHOLDS
+        ],
+        "default": PRIORITY_RANKS["LOW"]
+    }
+}
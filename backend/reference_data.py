@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import pickle
+import argparse
+from types import MappingProxyType
+
+# --------------------------------------------------
+# Reference Data: Districts & Assembly Constituencies
+# --------------------------------------------------
+# TN_Assembly_Constituencies_FULL.json is parsed once into immutable lookup
+# structures, shared by app.py, admin.py and server.py. The parsed form is
+# precompiled to a pickle next to the JSON and rebuilt whenever the JSON
+# changes, so a process start is one unpickle. No database queries.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_PATH = os.path.join(BASE_DIR, "TN_Assembly_Constituencies_FULL.json")
+COMPILED_PATH = os.path.join(BASE_DIR, "TN_Assembly_Constituencies_FULL.pickle")
+COMPILED_VERSION = 1
+
+
+def build_tables(source):
+    """Plain (picklable) tables from the constituency JSON."""
+    district_ta, constituencies, constituency_ta, constituency_district = {}, {}, {}, {}
+    for district, info in source.items():
+        district_ta[district] = info.get("ta") or district
+        names = []
+        for constituency in info.get("constituencies", []):
+            name = constituency["en"]
+            names.append(name)
+            constituency_ta[name] = constituency.get("ta") or name
+            constituency_district[name] = district
+        constituencies[district] = tuple(names)
+    return {
+        "districts": tuple(sorted(source)),
+        "district_ta": district_ta,
+        "constituencies": constituencies,
+        "constituency_ta": constituency_ta,
+        "constituency_district": constituency_district,
+    }
+
+def source_stamp(path=SOURCE_PATH):
+    stat = os.stat(path)
+    return COMPILED_VERSION, stat.st_mtime_ns, stat.st_size
+
+def compile_reference_data(source_path=SOURCE_PATH, compiled_path=COMPILED_PATH):
+    """Parses the JSON and writes the precompiled pickle; returns the tables."""
+    with open(source_path, "r", encoding="utf-8") as f:
+        tables = build_tables(json.load(f))
+    tmp_path = f"{compiled_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"stamp": source_stamp(source_path), "tables": tables}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, compiled_path)   # concurrent starters never see a half-written file
+    return tables
+
+def load_tables(source_path=SOURCE_PATH, compiled_path=COMPILED_PATH):
+    """The precompiled tables if they match the JSON, else freshly compiled ones."""
+    try:
+        with open(compiled_path, "rb") as f:
+            compiled = pickle.load(f)
+        if compiled["stamp"] == source_stamp(source_path):
+            return compiled["tables"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+        pass
+    try:
+        return compile_reference_data(source_path, compiled_path)
+    except OSError:
+        # Read-only install: parse the JSON without caching it
+        with open(source_path, "r", encoding="utf-8") as f:
+            return build_tables(json.load(f))
+
+
+_tables = load_tables()
+
+DISTRICTS = _tables["districts"]                                          # sorted option list
+DISTRICT_TA = MappingProxyType(_tables["district_ta"])                    # district -> Tamil name
+CONSTITUENCIES = MappingProxyType(_tables["constituencies"])              # district -> (constituencies)
+CONSTITUENCY_TA = MappingProxyType(_tables["constituency_ta"])            # constituency -> Tamil name
+CONSTITUENCY_DISTRICT = MappingProxyType(_tables["constituency_district"])  # constituency -> district
+
+
+def constituencies_of(district):
+    return CONSTITUENCIES.get(district, ())
+
+def district_of(constituency):
+    return CONSTITUENCY_DISTRICT.get(constituency)
+
+def is_valid_location(district, constituency):
+    """O(1): the constituency exists and lies in the district."""
+    return constituency in CONSTITUENCY_DISTRICT and CONSTITUENCY_DISTRICT[constituency] == district
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reference data maintenance")
+    parser.add_argument("--compile", action="store_true", help="rebuild the precompiled pickle from the JSON")
+    args = parser.parse_args()
+    if not args.compile:
+        parser.print_help()
+        sys.exit(0)
+
+    tables = compile_reference_data()
+    print(f"🗺️ Compiled {len(tables['districts'])} districts, "
+          f"{len(tables['constituency_district'])} constituencies -> {COMPILED_PATH}")
@@ -0,0 +1,145 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timezone
+
+from pymongo import DESCENDING, UpdateOne
+from dotenv import load_dotenv
+
+from backend.accounting import APPLIED_TOKENS
+
+load_dotenv()
+
+# Tunables (override through .env)
+REPORTER_BUCKET_SIZE = int(os.getenv("REPORTER_BUCKET_SIZE", "200"))
+RECENT_REPORTERS = int(os.getenv("RECENT_REPORTERS", "20"))    # kept on the issue document
+RECENT_BATCHES = int(os.getenv("RECENT_BATCHES", "20"))
+
+
+# --------------------------------------------------
+# Bucketed Reporter Storage
+# --------------------------------------------------
+# Every report of an issue lands in issue_reporters, REPORTER_BUCKET_SIZE
+# reporters per bucket document. The global issue only keeps a $slice of the
+# most recent ones, so it stays constant-size however many people report it.
+
+def reporter_ops(users_by_issue, now=None, token=None):
+    """
+    Upserts appending each issue's new reporters to its open bucket (one with
+    room left) or opening a new one. Pushes are split so a bucket overshoots
+    REPORTER_BUCKET_SIZE by less than one push. A `token` is recorded on the
+    bucket (see applied_issues).
+    """
+    now = now or datetime.now(timezone.utc)
+    ops = []
+    for issue_key, users in users_by_issue.items():
+        for start in range(0, len(users), REPORTER_BUCKET_SIZE):
+            part = users[start:start + REPORTER_BUCKET_SIZE]
+            push = {"reporters": {"$each": part}}
+            if token is not None:
+                push["applied"] = {"$each": [token], "$slice": -APPLIED_TOKENS}
+            ops.append(UpdateOne(
+                {"issue_key": issue_key, "count": {"$lt": REPORTER_BUCKET_SIZE}},
+                {
+                    "$push": push,
+                    "$inc": {"count": len(part)},
+                    "$set": {"last_at": now},
+                    "$setOnInsert": {"first_at": now}
+                },
+                upsert=True
+            ))
+    return ops
+
+def applied_issues(collection, issue_keys, token):
+    """
+    Issues whose reporters were already bucketed under `token`. Buckets have
+    no unique key to make the upsert itself idempotent, so a retried chunk
+    checks first.
+    """
+    return set(collection.distinct("issue_key", {"issue_key": {"$in": list(issue_keys)}, "applied": token}))
+
+def recent_reporters_push(users):
+    """$push spec keeping only the latest RECENT_REPORTERS on the issue document."""
+    return {"$each": users, "$slice": -RECENT_REPORTERS}
+
+def recent_batches_expression(batch_ids):
+    """Pipeline value: batch_ids appended (once each) to the issue's capped recent batches."""
+    batch_ids = {"$literal": list(batch_ids)}
+    return {"$slice": [
+        {"$concatArrays": [
+            {"$filter": {
+                "input": {"$ifNull": ["$batches", []]},
+                "cond": {"$not": [{"$in": ["$$this", batch_ids]}]}
+            }},
+            batch_ids
+        ]},
+        -RECENT_BATCHES
+    ]}
+
+def move_reporters(collection, source_key, target_key):
+    """Cluster merge: the source issue's buckets now belong to the target."""
+    collection.update_many({"issue_key": source_key}, {"$set": {"issue_key": target_key}})
+
+def reporters_page(collection, issue_key, before=None, limit=50):
+    """
+    Newest reporters first, one page at a time. Returns (reporters, cursor);
+    pass the cursor back as `before` for the next page (None when done).
+    """
+    query = {"issue_key": issue_key}
+    if before is not None:
+        query["_id"] = {"$lt": before}
+
+    reporters, last_id = [], None
+    for bucket in collection.find(query, {"reporters": 1}).sort("_id", DESCENDING):
+        reporters.extend(reversed(bucket["reporters"]))
+        last_id = bucket["_id"]
+        if len(reporters) >= limit:
+            break
+    # Whole buckets per page keep the cursor simple; a page may run a bit over `limit`
+    return reporters, (last_id if len(reporters) >= limit else None)
+
+
+# --------------------------------------------------
+# Migration (issues written before bucketing)
+# --------------------------------------------------
+def migrate_issue_reporters(global_issues, issue_reporters):
+    """
+    Moves the users of every issue written before bucketing into buckets and
+    trims the users / batches arrays; returns how many issues. Migrated (and
+    newer) issues carry reporters_migrated, so a re-run skips them, and an
+    issue whose buckets were written before a crash isn't bucketed twice.
+    Run it with the workers stopped: reports counted meanwhile would also
+    be in `users` and get bucketed again.
+    """
+    migrated = 0
+    cursor = global_issues.find(
+        {"reporters_migrated": {"$exists": False}},
+        {"issue_key": 1, "users": 1, "batches": 1}
+    )
+    for issue in cursor:
+        users = issue.get("users", [])
+        token = f"migration:{issue['_id']}"
+        if users and not applied_issues(issue_reporters, [issue["issue_key"]], token):
+            issue_reporters.bulk_write(reporter_ops({issue["issue_key"]: users}, token=token), ordered=True)
+        global_issues.update_one(
+            {"_id": issue["_id"]},
+            {"$set": {
+                "users": users[-RECENT_REPORTERS:],
+                "batches": issue.get("batches", [])[-RECENT_BATCHES:],
+                "reporters_migrated": True
+            }}
+        )
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reporter bucket maintenance")
+    parser.add_argument("--migrate", action="store_true", help="bucket and trim pre-existing issue documents")
+    args = parser.parse_args()
+    if not args.migrate:
+        parser.print_help()
+        sys.exit(0)
+
+    from backend.db import global_issues, issue_reporters
+    print(f"📦 Migrated {migrate_issue_reporters(global_issues, issue_reporters)} issues to reporter buckets")
@@ -0,0 +1,146 @@
+import sys
+import argparse
+from datetime import timezone
+
+from pymongo import UpdateOne
+
+from backend.accounting import guard
+
+# --------------------------------------------------
+# Jurisdiction Rollups
+# --------------------------------------------------
+# One counter document per (district, constituency, category, priority, day):
+# `total` feedbacks received and how many of them are `analyzed`. Feedbacks
+# awaiting analysis count under category/priority None. The write paths move
+# a feedback between keys with $inc, so the dashboard sums a few counters
+# instead of loading every feedback.
+
+KEY_FIELDS = ("district", "constituency", "category", "priority", "day")
+
+
+def rollup_key(doc, ai=None):
+    """The counter a feedback doc (with analysis `ai`, if any) belongs to."""
+    location = doc.get("location", {})
+    created = doc.get("created_at")
+    if created is not None and created.tzinfo is not None:
+        created = created.astimezone(timezone.utc)
+    ai = ai or {}
+    return (
+        location.get("district"),
+        location.get("constituency"),
+        ai.get("category"),
+        ai.get("priority"),
+        created.strftime("%Y-%m-%d") if created else None
+    )
+
+def rollup_ops(moves, token=None):
+    """
+    Upserts applying `moves`, an iterable of (old_key, new_key, was_analyzed,
+    is_analyzed); old_key None for a newly received feedback. Increments are
+    folded per key, so a chunk costs one op per counter it touches. With a
+    `token` they apply once per token (backend/accounting.py).
+    """
+    deltas = {}
+    for old_key, new_key, was_analyzed, is_analyzed in moves:
+        if old_key is not None:
+            delta = deltas.setdefault(old_key, {"total": 0, "analyzed": 0})
+            delta["total"] -= 1
+            delta["analyzed"] -= int(was_analyzed)
+        delta = deltas.setdefault(new_key, {"total": 0, "analyzed": 0})
+        delta["total"] += 1
+        delta["analyzed"] += int(is_analyzed)
+
+    return [
+        UpdateOne(*guard(dict(zip(KEY_FIELDS, key)), {"$inc": delta}, token), upsert=True)
+        for key, delta in deltas.items()
+        if delta["total"] or delta["analyzed"]
+    ]
+
+def received_ops(docs):
+    """Rollup increments for newly stored feedback docs."""
+    return rollup_ops((None, rollup_key(doc), False, False) for doc in docs)
+
+def analyzed_ops(docs, results, token=None):
+    """Rollup moves for docs whose analysis changes to `results` (docs still carry the old `ai`)."""
+    return rollup_ops((
+        (rollup_key(doc, doc.get("ai")), rollup_key(doc, res), bool(doc.get("ai")), True)
+        for doc, res in zip(docs, results)
+    ), token)
+
+
+# --------------------------------------------------
+# Dashboard Reads
+# --------------------------------------------------
+def rollup_query(districts=None, category=None):
+    query = {}
+    if districts is not None:
+        query["district"] = {"$in": list(districts)}
+    if category is not None:
+        query["category"] = category
+    return query
+
+def summarize(collection, districts=None, category=None):
+    """
+    {"total", "analyzed", "pending", "by_category"} over the counters in
+    scope. A department (category) view only counts analyzed feedbacks, as
+    the category is unknown until then.
+    """
+    summary = {"total": 0, "analyzed": 0, "pending": 0, "by_category": {}}
+    for row in collection.find(rollup_query(districts, category), {"_id": 0, "category": 1, "total": 1, "analyzed": 1}):
+        summary["total"] += row.get("total", 0)
+        summary["analyzed"] += row.get("analyzed", 0)
+        if row.get("category"):
+            by_category = summary["by_category"]
+            by_category[row["category"]] = by_category.get(row["category"], 0) + row.get("analyzed", 0)
+    summary["pending"] = summary["total"] - summary["analyzed"]
+    return summary
+
+
+# --------------------------------------------------
+# Rebuild (drift repair)
+# --------------------------------------------------
+def rebuild_rollups(feedbacks, target="feedback_rollups"):
+    """
+    Recomputes every counter from the feedbacks and swaps them in with $out
+    (atomic replace, indexes kept). Increments landing while it runs are
+    lost: stop the writers (server, app, workers) before running it.
+    """
+    feedbacks.aggregate([
+        {"$group": {
+            "_id": {
+                "district": "$location.district",
+                "constituency": "$location.constituency",
+                "category": {"$ifNull": ["$ai.category", None]},
+                "priority": {"$ifNull": ["$ai.priority", None]},
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+            },
+            "total": {"$sum": 1},
+            "analyzed": {"$sum": {"$cond": [{"$ifNull": ["$ai", False]}, 1, 0]}}
+        }},
+        {"$project": {"_id": 0, **{field: f"$_id.{field}" for field in KEY_FIELDS}, "total": 1, "analyzed": 1}},
+        {"$out": target}
+    ])
+    return feedbacks.database[target].count_documents({})
+
+def seed_rollups(feedbacks, rollups):
+    """
+    Builds the counters of a database that predates them from its feedbacks;
+    returns how many, 0 when there are no feedbacks yet. Counters written
+    before the seed (e.g. by the server's first submissions) are replaced,
+    as the rebuild counts those feedbacks too.
+    """
+    if not feedbacks.estimated_document_count():
+        return 0
+    return rebuild_rollups(feedbacks, rollups.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jurisdiction rollup maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every counter from the feedbacks")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        sys.exit(0)
+
+    from backend.db import feedbacks
+    print(f"📊 Rebuilt {rebuild_rollups(feedbacks)} rollup counters")
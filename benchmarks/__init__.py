@@ -0,0 +1,12 @@
+# Offline benchmarks for the analysis pipeline. Run from the repository root:
+#
+#   python -m benchmarks.bench_ai_engine -n 20000 --out before.json
+#   python -m benchmarks.bench_ai_engine -n 20000 --compare before.json
+#   python -m benchmarks.bench_bulk_analyzer --sizes 10000 100000
+#   python -m benchmarks.bench_llm_client -n 200     (uses the local fake API)
+#   python -m benchmarks.fake_openai_server --port 8089
+#   python -m benchmarks.bench_bulk_write -n 5000      (needs a local mongod)
+#   python -m benchmarks.stress_batch_allocation       (needs a local mongod)
+#   python -m benchmarks.load_test_server -n 5000      (needs a local mongod)
+#
+# benchmarks.corpus.generate_corpus() is the shared seeded Tanglish corpus.
@@ -0,0 +1,156 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from backend.ai_engine import (
+    ENGINE_VERSION, translate_to_english, detect_category, detect_priority,
+    extract_main_issue, generate_summary, analyze_feedback_batch
+)
+from benchmarks.corpus import generate_corpus
+
+STAGES = ["translate", "category", "priority", "summary"]
+
+
+# ---------------- HELPERS ----------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def latency_summary(samples_ns):
+    values = sorted(samples_ns)
+    total = sum(values)
+    return {
+        "total_s": total / 1e9,
+        "mean_us": total / len(values) / 1e3 if values else 0.0,
+        "p50_us": percentile(values, 50) / 1e3,
+        "p95_us": percentile(values, 95) / 1e3,
+        "p99_us": percentile(values, 99) / 1e3,
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------------- HARNESS ----------------
+def run_stages(corpus):
+    """Times each pipeline stage per item, same order as analyze_feedback_batch."""
+    clock = time.perf_counter_ns
+    timings = {stage: [] for stage in STAGES}
+    per_item = []
+
+    for text in corpus:
+        t0 = clock()
+        eng_text = translate_to_english(text)
+        t1 = clock()
+        category = detect_category(eng_text)
+        extract_main_issue(category)
+        t2 = clock()
+        detect_priority(eng_text)
+        t3 = clock()
+        generate_summary(eng_text)
+        t4 = clock()
+
+        timings["translate"].append(t1 - t0)
+        timings["category"].append(t2 - t1)
+        timings["priority"].append(t3 - t2)
+        timings["summary"].append(t4 - t3)
+        per_item.append(t4 - t0)
+
+    return timings, per_item
+
+def run_batch(corpus):
+    """End-to-end throughput of the public batch API."""
+    start = time.perf_counter()
+    analyze_feedback_batch(corpus)
+    return time.perf_counter() - start
+
+def run_benchmark(n, seed, repeat):
+    corpus = generate_corpus(n, seed=seed)
+    run_batch(corpus[:1000])  # warm-up
+
+    best = None
+    for _ in range(repeat):
+        timings, per_item = run_stages(corpus)
+        batch_seconds = run_batch(corpus)
+        if best is None or batch_seconds < best[2]:
+            best = (timings, per_item, batch_seconds)
+    timings, per_item, batch_seconds = best
+
+    return {
+        "meta": {
+            "engine_version": ENGINE_VERSION,
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "items": n,
+            "seed": seed,
+            "repeat": repeat,
+            "avg_words": sum(len(t.split()) for t in corpus) / n,
+        },
+        "throughput": {
+            "batch_items_per_sec": n / batch_seconds,
+            "batch_seconds": batch_seconds,
+        },
+        "latency": latency_summary(per_item),
+        "stages": {stage: latency_summary(samples) for stage, samples in timings.items()},
+    }
+
+
+# ---------------- REPORTING ----------------
+def print_report(report, baseline=None):
+    meta = report["meta"]
+    print(f"ai_engine {meta['engine_version']} @ {meta['git_commit']}  "
+          f"n={meta['items']:,} seed={meta['seed']} avg_words={meta['avg_words']:.1f}")
+    print(f"  batch: {report['throughput']['batch_items_per_sec']:,.0f} items/s")
+
+    rows = [("per-item", report["latency"])] + list(report["stages"].items())
+    print(f"  {'stage':<10}{'total s':>10}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for name, stats in rows:
+        line = (f"  {name:<10}{stats['total_s']:>10.3f}{stats['p50_us']:>10.1f}"
+                f"{stats['p95_us']:>10.1f}{stats['p99_us']:>10.1f}")
+        if baseline:
+            old = baseline["latency"] if name == "per-item" else baseline["stages"].get(name)
+            if old and old["total_s"]:
+                line += f"   ({(stats['total_s'] / old['total_s'] - 1) * 100:+.1f}% vs baseline)"
+        print(line)
+
+    if baseline:
+        old_rate = baseline["throughput"]["batch_items_per_sec"]
+        new_rate = report["throughput"]["batch_items_per_sec"]
+        print(f"  throughput vs baseline ({baseline['meta'].get('git_commit')}): "
+              f"{(new_rate / old_rate - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput / latency benchmark for backend/ai_engine.py")
+    parser.add_argument("-n", "--items", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="runs; the fastest is reported")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report from another commit")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.items, args.seed, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.out}", file=sys.stderr)
@@ -0,0 +1,37 @@
+import argparse
+import time
+
+from backend.ai_engine import analyze_feedback_batch
+from backend.bulk_analyzer import analyze_feedback_bulk
+from benchmarks.corpus import generate_corpus
+
+
+# ---------------- PARITY + TIMING ----------------
+def run(sizes, parity_sample):
+    for n in sizes:
+        texts = generate_corpus(n)
+
+        sample = texts[:parity_sample]
+        if analyze_feedback_batch(sample) != analyze_feedback_bulk(sample):
+            raise SystemExit(f"❌ Parity mismatch at n={n}")
+
+        start = time.perf_counter()
+        analyze_feedback_batch(texts)
+        per_item = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyze_feedback_bulk(texts)
+        bulk = time.perf_counter() - start
+
+        print(
+            f"n={n:>9,}  per-item {per_item:8.2f}s ({n / per_item:>9,.0f}/s)  "
+            f"bulk {bulk:8.2f}s ({n / bulk:>9,.0f}/s)  speedup x{per_item / bulk:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-item vs vectorized batch analysis")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--parity-sample", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.sizes, args.parity_sample)
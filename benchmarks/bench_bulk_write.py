@@ -0,0 +1,140 @@
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timezone
+
+from pymongo import MongoClient, UpdateOne, monitoring
+
+from backend import feedback_service
+from backend.feedback_service import update_global_issues
+from backend.priority import calculate_priority
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to the server: one per round trip."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def make_feedbacks(n, issues, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            "_id": i,
+            "location": {"district": "Chennai", "constituency": "Mylapore"},
+            "user": {"name": f"user-{i}", "booth_no": rng.randint(1, 300)},
+            "ai": {
+                "category": "Water",
+                "main_issue": "Water Supply Issue",
+                "issue_key": f"issue-{rng.randrange(issues)}",
+                "issue_keywords": ["water", "supply"]
+            }
+        }
+        for i in range(n)
+    ]
+
+
+# ---------------- BEFORE: one round trip (or three) per feedback ----------------
+def per_document_store(feedbacks, global_issues, docs, batch_id):
+    for fb in docs:
+        feedbacks.update_one({"_id": fb["_id"]}, {"$set": {"ai": fb["ai"]}})
+
+    for fb in docs:
+        issue_key = fb["ai"]["issue_key"]
+        user_info = {"name": fb["user"]["name"], "booth": fb["user"]["booth_no"], "batch_id": batch_id}
+        existing = global_issues.find_one({"issue_key": issue_key})
+        if existing:
+            global_issues.update_one(
+                {"issue_key": issue_key},
+                {
+                    "$inc": {"total_reports": 1},
+                    "$push": {"users": user_info},
+                    "$addToSet": {"batches": batch_id},
+                    "$set": {
+                        "priority": calculate_priority(existing["total_reports"] + 1),
+                        "keywords": fb["ai"]["issue_keywords"],
+                        "last_updated": datetime.now(timezone.utc)
+                    }
+                }
+            )
+        else:
+            global_issues.insert_one({
+                "issue_key": issue_key,
+                "category": fb["ai"]["category"],
+                "issue_text": fb["ai"]["main_issue"],
+                "keywords": fb["ai"]["issue_keywords"],
+                "total_reports": 1,
+                "priority": "LOW",
+                "batches": [batch_id],
+                "users": [user_info],
+                "last_updated": datetime.now(timezone.utc)
+            })
+
+
+# ---------------- AFTER: constant round trips per batch ----------------
+def bulk_store(feedbacks, global_issues, docs, batch_id):
+    feedbacks.bulk_write(
+        [UpdateOne({"_id": fb["_id"]}, {"$set": {"ai": fb["ai"]}}) for fb in docs],
+        ordered=False
+    )
+    feedback_service.global_issues = global_issues
+    feedback_service.issue_districts = global_issues.database["issue_districts"]
+    update_global_issues(docs, batch_id)
+
+
+def run(store, db, counter, docs, batch_size):
+    db.drop_collection("feedbacks")
+    db.drop_collection("global_issues")
+    db.drop_collection("issue_districts")
+    db["feedbacks"].insert_many([{"_id": fb["_id"], "user": fb["user"]} for fb in docs])
+    db["global_issues"].create_index("issue_key", unique=True)
+    feedback_service._issue_index_ready = True
+
+    counter.count = 0
+    start = time.perf_counter()
+    for offset in range(0, len(docs), batch_size):
+        store(db["feedbacks"], db["global_issues"], docs[offset:offset + batch_size], f"batch-{offset}")
+    elapsed = time.perf_counter() - start
+
+    totals = {d["issue_key"]: d["total_reports"] for d in db["global_issues"].find({}, {"total_reports": 1, "issue_key": 1})}
+    return elapsed, counter.count, totals
+
+
+def main(args):
+    counter = CommandCounter()
+    client = MongoClient(args.uri, event_listeners=[counter])
+    db = client[args.database]
+    docs = make_feedbacks(args.items, args.issues, args.seed)
+
+    print(f"{'mode':>14} {'batch':>6} {'seconds':>9} {'docs/s':>9} {'round trips':>12}")
+    for batch_size in args.batch_size:
+        results = {}
+        for name, store in (("per-document", per_document_store), ("bulk", bulk_store)):
+            elapsed, trips, totals = run(store, db, counter, docs, batch_size)
+            results[name] = totals
+            print(f"{name:>14} {batch_size:>6} {elapsed:>9.3f} {len(docs) / elapsed:>9.0f} {trips:>12}")
+        assert results["per-document"] == results["bulk"], "issue totals differ between modes"
+
+    client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-document vs bulk persistence against a local mongod")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default="feedback_ai_bench", help="scratch database, dropped afterwards")
+    parser.add_argument("-n", "--items", type=int, default=5000)
+    parser.add_argument("--issues", type=int, default=50, help="distinct issue keys")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[15, 500])
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
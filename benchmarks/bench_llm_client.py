@@ -0,0 +1,56 @@
+import time
+import asyncio
+import argparse
+
+from backend.llm_analyzer import AsyncFeedbackAnalyzer
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_openai_server import start_in_thread
+
+
+async def run_config(base_url, texts, concurrency, pack_size, deadline):
+    analyzer = AsyncFeedbackAnalyzer(
+        base_url=base_url, max_concurrency=concurrency, pack_size=pack_size,
+        deadline=deadline, backoff_base=0.05, backoff_cap=1.0
+    )
+    async with analyzer:
+        start = time.perf_counter()
+        results = await analyzer.analyze_many(texts)
+        elapsed = time.perf_counter() - start
+
+    assert len(results) == len(texts) and all("summary" in r for r in results)
+    return elapsed, analyzer.counters
+
+
+def main(args):
+    server, base_url = start_in_thread(
+        latency=args.latency, latency_per_item=args.latency_per_item,
+        max_inflight=args.max_inflight, rate_limit_ratio=args.rate_limit_ratio
+    )
+    texts = generate_corpus(args.items, seed=args.seed)
+
+    configs = [(1, 1)] + [(c, p) for c in args.concurrency for p in args.pack_size]
+    baseline = None
+    print(f"{'concurrency':>11} {'pack':>5} {'seconds':>9} {'items/s':>9} {'speedup':>8} "
+          f"{'calls':>6} {'retries':>8} {'429s':>5}")
+    for concurrency, pack_size in configs:
+        elapsed, counters = asyncio.run(run_config(base_url, texts, concurrency, pack_size, args.deadline))
+        baseline = baseline or elapsed
+        print(f"{concurrency:>11} {pack_size:>5} {elapsed:>9.2f} {len(texts) / elapsed:>9.1f} "
+              f"{baseline / elapsed:>7.1f}x {counters['calls']:>6} {counters['retries']:>8} "
+              f"{counters['rate_limited']:>5}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async LLM client throughput against the local fake API")
+    parser.add_argument("-n", "--items", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--pack-size", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--latency-per-item", type=float, default=0.02)
+    parser.add_argument("--max-inflight", type=int, default=8)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.05)
+    parser.add_argument("--deadline", type=float, default=10.0)
+    main(parser.parse_args())
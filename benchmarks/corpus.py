@@ -0,0 +1,56 @@
+import random
+
+from backend.ai_engine import TAMIL_KEYWORDS, CATEGORY_KEYWORDS, COMMON_PHRASES, TAMIL_TO_ENGLISH
+
+# Words citizens wrap around the actual complaint
+FILLER_WORDS = [
+    "sir", "please", "our", "area", "street", "near", "since", "the", "is", "and",
+    "enga", "inga", "ippo", "daily", "morning", "night", "ward", "people", "help", "pannunga"
+]
+DURATIONS = ["2 days", "3 days", "1 week", "10 days", "2 weeks"]
+PUNCTUATION = ["", "", "", ".", "!", "!!", ",", "?"]
+
+
+# ---------------- LENGTH DISTRIBUTION ----------------
+def sample_length(rng):
+    """
+    Word count per feedback: log-normal around ~12 words with a long tail,
+    matching short WhatsApp-style complaints and the occasional essay.
+    """
+    return max(1, min(200, int(rng.lognormvariate(2.5, 0.7))))
+
+
+# ---------------- CORPUS GENERATOR ----------------
+def generate_corpus(n, seed=42, tamil_script_ratio=0.1):
+    """
+    Deterministic synthetic Tanglish corpus of `n` feedback texts mixing
+    TAMIL_KEYWORDS, CATEGORY_KEYWORDS, COMMON_PHRASES and filler words.
+    """
+    rng = random.Random(seed)
+
+    romanized_phrases = [p for p in COMMON_PHRASES if p.isascii()]
+    tamil_phrases = [p for p in COMMON_PHRASES if not p.isascii()]
+    tamil_words = [w for w in TAMIL_TO_ENGLISH if not w.isascii()]
+    category_words = [w for words in CATEGORY_KEYWORDS.values() for w in words]
+
+    corpus = []
+    for _ in range(n):
+        use_script = rng.random() < tamil_script_ratio
+        words = []
+        for _ in range(sample_length(rng)):
+            roll = rng.random()
+            if roll < 0.35:
+                words.append(rng.choice(FILLER_WORDS))
+            elif roll < 0.60:
+                words.append(rng.choice(tamil_words if use_script else TAMIL_KEYWORDS))
+            elif roll < 0.85:
+                words.append(rng.choice(category_words))
+            elif roll < 0.97:
+                words.append(rng.choice(tamil_phrases if use_script else romanized_phrases))
+            else:
+                words.append(rng.choice(DURATIONS))
+            words[-1] += rng.choice(PUNCTUATION)
+
+        text = " ".join(words)
+        corpus.append(text.capitalize() if rng.random() < 0.5 else text)
+    return corpus
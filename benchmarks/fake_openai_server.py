@@ -0,0 +1,126 @@
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from backend.ai_engine import analyze_feedback_batch
+from backend.llm_analyzer import PACKED_MARKER
+
+# Keyword-engine category -> the LLM prompt's category vocabulary
+CATEGORY_MAP = {"Services": "Technical", "Safety": "Security"}
+
+
+# ---------------- FAKE ANALYSIS ----------------
+def fake_analysis(text):
+    """Deterministic stand-in for a model answer, built from the keyword engine."""
+    result = analyze_feedback_batch([text])[0]
+    confidence = {"High": "high", "Medium": "medium"}.get(result["priority"], "low")
+    return {
+        "summary": result["summary"],
+        "main_issue": result["main_issue"],
+        "category": CATEGORY_MAP.get(result["category"], "Other"),
+        "issues": [{"problem": result["main_issue"], "area": "Backend"}],
+        "emotion": "frustration" if confidence == "high" else "concern",
+        "confidence": confidence
+    }
+
+def answer(messages):
+    prompt = messages[-1]["content"]
+    if PACKED_MARKER in prompt:
+        items = json.loads(prompt.split(PACKED_MARKER, 1)[1].strip())
+        return {"results": [{"id": item["id"], **fake_analysis(item["text"])} for item in items]}
+    return fake_analysis(prompt.split("Message:", 1)[-1].strip())
+
+
+# ---------------- HTTP SERVER ----------------
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "not found"}})
+
+        with server.lock:
+            server.requests += 1
+            limited = (server.inflight >= server.max_inflight
+                       or random.random() < server.rate_limit_ratio)
+            if limited:
+                server.rate_limited += 1
+            else:
+                server.inflight += 1
+
+        if limited:
+            return self._send(
+                429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                {"Retry-After": "0.05"}
+            )
+
+        try:
+            # Latency grows a little with prompt size, like a real model
+            time.sleep(server.latency + server.latency_per_item * body["messages"][-1]["content"].count('"id"'))
+            content = json.dumps(answer(body["messages"]), ensure_ascii=False)
+            self._send(200, {
+                "id": f"chatcmpl-fake-{server.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            })
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+
+def make_server(port=0, latency=0.2, latency_per_item=0.02, max_inflight=32, rate_limit_ratio=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.latency_per_item = latency_per_item
+    server.max_inflight = max_inflight
+    server.rate_limit_ratio = rate_limit_ratio
+    server.lock = threading.Lock()
+    server.inflight = server.requests = server.rate_limited = 0
+    return server
+
+def start_in_thread(**options):
+    """Starts the fake server in the background; returns (server, base_url)."""
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for offline benchmarks")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="base seconds per call")
+    parser.add_argument("--latency-per-item", type=float, default=0.02, help="extra seconds per packed feedback")
+    parser.add_argument("--max-inflight", type=int, default=32, help="429 above this many concurrent calls")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="random share of calls answered 429")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency, args.latency_per_item, args.max_inflight, args.rate_limit_ratio)
+    print(f"🤖 Fake OpenAI API on http://127.0.0.1:{args.port}/v1 (set OPENAI_BASE_URL to use it)")
+    server.serve_forever()
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import subprocess
+
+from fastapi import FastAPI
+
+from backend.reference_data import CONSTITUENCY_DISTRICT
+
+# Threadpool model: the pre-async server, a sync endpoint on the blocking driver
+threadpool_app = FastAPI()
+
+@threadpool_app.post("/api/feedback")
+def submit_feedback_threadpool(req: dict):
+    from backend.feedback_service import process_feedback
+    return process_feedback(req)
+
+APPS = {
+    "threadpool": "benchmarks.load_test_server:threadpool_app",
+    "async": "server:app",
+}
+
+
+# ---------------- CLIENT ----------------
+# The API only accepts real constituencies: load is spread over the first N of them
+CONSTITUENCIES = tuple(CONSTITUENCY_DISTRICT)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def make_body(rng, constituencies):
+    constituency = CONSTITUENCIES[rng.randrange(min(constituencies, len(CONSTITUENCIES)))]
+    return json.dumps({
+        "district": CONSTITUENCY_DISTRICT[constituency],
+        "constituency": constituency,
+        "booth_no": str(rng.randint(1, 300)),
+        "type_of_feedback": "Complaint",
+        "feedback_text": f"Water supply cut for {rng.randint(1, 30)} days near ward {rng.randint(1, 9999)}",
+        "rating": rng.randint(1, 5)
+    }).encode("utf-8")
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+async def client(port, requests, latencies, errors, seed, constituencies):
+    """One keep-alive connection sending requests back to back."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(requests):
+        body = make_body(rng, constituencies)
+        writer.write(
+            b"POST /api/feedback HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        start = time.perf_counter()
+        await writer.drain()
+        status = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+    writer.close()
+
+async def hammer(port, total, concurrency, constituencies):
+    latencies, errors = [], []
+    per_client = total // concurrency
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, per_client, latencies, errors, seed, constituencies) for seed in range(concurrency)
+    ))
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+# ---------------- SERVER ----------------
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+def run_mode(mode, args):
+    port = free_port()
+    env = {**os.environ, "MONGODB_URI": args.uri, "MONGODB_DB": args.database}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", APPS[mode], "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        asyncio.run(hammer(port, min(200, args.requests), args.concurrency, args.constituencies))  # warm-up
+        return asyncio.run(hammer(port, args.requests, args.concurrency, args.constituencies))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    from pymongo import MongoClient
+    mongo = MongoClient(args.uri)
+
+    print(f"{'mode':>11} {'requests':>9} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in args.modes:
+        mongo.drop_database(args.database)
+        elapsed, latencies, errors = run_mode(mode, args)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        print(f"{mode:>11} {len(latencies):>9} {args.concurrency:>5} {len(latencies) / elapsed:>8.0f} "
+              f"{p50:>8.1f} {p99:>8.1f} {len(errors):>7}")
+
+    mongo.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="POST /api/feedback load test: threadpool vs async (local mongod)")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default="feedback_ai_loadtest", help="scratch database, dropped afterwards")
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=200)
+    parser.add_argument("--constituencies", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", choices=list(APPS), default=list(APPS))
+    main(parser.parse_args())
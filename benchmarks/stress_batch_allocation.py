@@ -0,0 +1,151 @@
+import os
+import time
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from pymongo import MongoClient, ReturnDocument
+
+from backend.batch_scheduler import BatchScheduler
+
+
+def constituencies(k):
+    return [("Stress", f"Constituency-{i}") for i in range(k)]
+
+
+# ---------------- BEFORE: find_one_and_update, then insert_one on a miss ----------------
+def legacy_allocate(batches, district, constituency, n, limit):
+    allocations = []
+    for _ in range(n):
+        batch = batches.find_one_and_update(
+            {"district": district, "constituency": constituency, "status": "collecting"},
+            {"$inc": {"count": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not batch:
+            batch = {
+                "batch_id": str(uuid4()), "district": district, "constituency": constituency,
+                "count": 1, "limit": limit, "status": "collecting", "created_at": datetime.now(timezone.utc)
+            }
+            batches.insert_one(batch)
+        if batch["count"] >= batch["limit"]:
+            batches.update_one({"batch_id": batch["batch_id"]}, {"$set": {"status": "queued"}})
+        allocations.append({"batch_id": batch["batch_id"], "slots": 1})
+    return allocations
+
+
+# ---------------- LOAD ----------------
+def submitter(args, seed):
+    """One process: `threads` submitters hammering a few constituencies."""
+    client = MongoClient(args.uri)
+    db = client[args.database]
+    scheduler = BatchScheduler(
+        db["batches"], db["batch_policies"], size_limit=args.limit,
+        max_age_seconds=86400, slo_seconds=86400
+    )
+    places = constituencies(args.constituencies)
+    taken, requested = [], Counter()
+    lock = threading.Lock()
+
+    def run(thread_seed):
+        rng = random.Random(thread_seed)
+        local, local_requested = [], Counter()
+        for _ in range(args.submissions):
+            district, constituency = rng.choice(places)
+            n = rng.randint(1, args.max_slots)
+            if args.legacy:
+                allocations = legacy_allocate(db["batches"], district, constituency, n, args.limit)
+            else:
+                allocations = scheduler.allocate(district, constituency, n)
+            local.extend((a["batch_id"], a["slots"]) for a in allocations)
+            local_requested[constituency] += n
+        with lock:
+            taken.extend(local)
+            requested.update(local_requested)
+
+    threads = [threading.Thread(target=run, args=(seed * 1000 + i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+    return taken, requested
+
+
+def verify(db, taken, requested, limit):
+    problems = []
+    by_batch = defaultdict(int)
+    for batch_id, slots in taken:
+        by_batch[batch_id] += slots
+
+    batches = {b["batch_id"]: b for b in db["batches"].find()}
+    granted = Counter()
+    for batch_id, slots in by_batch.items():
+        batch = batches.get(batch_id)
+        if batch is None:
+            problems.append(f"slots granted in missing batch {batch_id}")
+            continue
+        granted[batch["constituency"]] += slots
+        if slots != batch["count"]:
+            problems.append(f"{batch_id}: {slots} slots granted but count={batch['count']}")
+        if batch["count"] > batch["limit"]:
+            problems.append(f"{batch_id}: overfilled {batch['count']}/{batch['limit']}")
+        if batch["status"] != "collecting" and batch["count"] != batch["limit"]:
+            problems.append(f"{batch_id}: closed at {batch['count']}/{batch['limit']}")
+
+    for constituency, n in requested.items():
+        if granted[constituency] != n:
+            problems.append(f"{constituency}: requested {n} slots, granted {granted[constituency]}")
+
+    collecting = Counter(b["constituency"] for b in batches.values() if b["status"] == "collecting")
+    for constituency, count in collecting.items():
+        if count > 1:
+            problems.append(f"{constituency}: {count} collecting batches")
+    return problems, len(batches)
+
+
+def main(args):
+    client = MongoClient(args.uri)
+    client.drop_database(args.database)
+    if not args.legacy:
+        BatchScheduler(client[args.database]["batches"], client[args.database]["batch_policies"]).ensure_indexes()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        outcomes = list(pool.map(submitter, [args] * args.processes, range(args.processes)))
+    elapsed = time.perf_counter() - start
+
+    taken = [item for t, _ in outcomes for item in t]
+    requested = sum((r for _, r in outcomes), Counter())
+    problems, batch_count = verify(client[args.database], taken, requested, args.limit)
+
+    total = sum(requested.values())
+    mode = "legacy" if args.legacy else "atomic"
+    print(f"{mode}: {total} slots in {len(taken)} allocations over {batch_count} batches, "
+          f"{args.processes}x{args.threads} submitters, {elapsed:.2f}s ({total / elapsed:.0f} slots/s)")
+    for problem in problems[:20]:
+        print(f"  ❌ {problem}")
+    if len(problems) > 20:
+        print(f"  ... {len(problems) - 20} more")
+    print("✅ no lost, duplicated or overfilled slots" if not problems else f"❌ {len(problems)} problems")
+
+    client.drop_database(args.database)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent batch slot allocation stress test (local mongod)")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default="feedback_ai_stress", help="scratch database, dropped afterwards")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--submissions", type=int, default=500, help="per thread")
+    parser.add_argument("--constituencies", type=int, default=3, help="few, to force contention")
+    parser.add_argument("--limit", type=int, default=15)
+    parser.add_argument("--max-slots", type=int, default=1, help="slots per submission (bulk uploads: >1)")
+    parser.add_argument("--legacy", action="store_true", help="run the old find-then-insert allocator")
+    raise SystemExit(main(parser.parse_args()))
@@ -1,21 +1,30 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
-import json
-from openai import OpenAI
 from pymongo import MongoClient
 from datetime import datetime, timezone
 import hashlib
+from backend.analysis_cache import AnalysisCache
+from backend.llm_analyzer import LLM_MODEL, analyze_texts
+from backend.near_duplicate import NearDuplicateIndex
+from backend.issue_clustering import IssueClusterer, relabel_feedbacks
+from bson import ObjectId
 
 # ---------------- LOAD ENV ----------------
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 mongo_client = MongoClient(os.getenv("MONGODB_URI"))
 db = mongo_client["feedback_db"]
 collection = db["feedback_logs"]
 
+# Bump when the model or prompt changes: cached analyses are keyed by it
+LLM_ENGINE_VERSION = f"{LLM_MODEL}:v1"
+
+@st.cache_resource
+def get_llm_cache():
+    # Shared across reruns/sessions so repeated complaints skip the API call
+    return AnalysisCache(LLM_ENGINE_VERSION, db["analysis_cache"])
+
 # ---------------- TEXT CLEANING ----------------
 def normalize_input(text):
     return " ".join(text.lower().strip().split())
@@ -64,56 +73,50 @@ def get_followup_question(priority):
 def generate_hash(text):
     return hashlib.md5(text.encode()).hexdigest()
 
-def is_duplicate(feedback_hash):
-    return collection.find_one({"feedback_hash": feedback_hash}) is not None
+@st.cache_resource
+def get_duplicate_index():
+    # MinHash/LSH over word shingles: catches reworded / re-punctuated copies
+    collection.create_index("feedback_hash")   # exact-match fallback below
+    return NearDuplicateIndex(db["feedback_minhash"])
+
+@st.cache_resource
+def get_issue_clusterer():
+    # Free-text main issues are merged by similarity, per category
+    return IssueClusterer(db["issue_clusters"])
+
+def assign_issue(document):
+    clusterer = get_issue_clusterer()
+    clusterer.refresh([IssueClusterer.scope_key("All", "All", document["category"])])
+    issue_key, events = clusterer.assign(
+        document["_id"],
+        f"{document['main_issue']} {document['summary']}",
+        "All", "All", document["category"], document["main_issue"]
+    )
+    relabel_feedbacks(collection, events, "issue_key")
+    return issue_key
+
+def find_duplicate(cleaned_input):
+    """Stored document this feedback nearly duplicates, or None."""
+    index = get_duplicate_index()
+    match = index.query(cleaned_input)
+    if match:
+        return collection.find_one({"_id": match[0]})
+
+    # Feedbacks stored before the MinHash index existed are only known by hash
+    original = collection.find_one({"feedback_hash": generate_hash(cleaned_input)})
+    if original:
+        index.add(original["_id"], cleaned_input)
+    return original
 
 # ---------------- AI ANALYSIS ----------------
 def analyze_feedback(feedback_text):
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": """
-You are an AI feedback analysis system.
-Return ONLY valid JSON.
-Classify emotion as one of:
-frustration, anger, confusion, concern, neutral, satisfaction.
-"""
-            },
-            {
-                "role": "user",
-                "content": f"""
-{{
-  "summary": "...",
-  "main_issue": "...",
-  "category": "Technical / Political / Privacy / Payment / Security / Policy / Other",
-  "issues": [
-    {{
-      "problem": "...",
-      "area": "Frontend / Backend / Security / Policy / Network"
-    }}
-  ],
-  "emotion": "...",
-  "confidence": "high / medium / low"
-}}
-
-Message:
-{feedback_text}
-"""
-            }
-        ],
-        temperature=0,
-        response_format={"type": "json_object"}
-    )
-
-    return json.loads(response.choices[0].message.content)
+    # Retries, backoff and the per-call deadline live in the shared client
+    return analyze_texts([feedback_text], pack_size=1, max_concurrency=1)[0]
 
 # ---------------- SAVE TO DB ----------------
 def save_to_mongodb(user_input, cleaned_input, analysis):
     feedback_hash = generate_hash(cleaned_input)
 
-    duplicate = is_duplicate(feedback_hash)
     priority = map_priority(analysis["confidence"])
     followup = get_followup_question(priority)
     system_message = get_default_message(priority)
@@ -123,6 +126,7 @@ def save_to_mongodb(user_input, cleaned_input, analysis):
     )
 
     document = {
+        "_id": ObjectId(),
         "user_input": user_input,
         "cleaned_input": cleaned_input,
         "summary": analysis["summary"],
@@ -135,13 +139,15 @@ def save_to_mongodb(user_input, cleaned_input, analysis):
         "assigned_teams": assigned_teams,
         "system_message": system_message,
         "followup_question": followup,
-        "is_duplicate": duplicate,
+        "is_duplicate": False,
         "feedback_hash": feedback_hash,
         "created_at": datetime.now(timezone.utc)
     }
 
-    if not duplicate:
-        collection.insert_one(document)
+    document["issue_key"] = assign_issue(document)
+
+    collection.insert_one(document)
+    get_duplicate_index().add(document["_id"], cleaned_input)
 
     return document
 
@@ -160,8 +166,15 @@ if st.button("Analyze Feedback"):
         with st.spinner("Analyzing feedback..."):
             try:
                 cleaned_input = normalize_input(feedback)
-                analysis = analyze_feedback(cleaned_input)
-                result = save_to_mongodb(feedback, cleaned_input, analysis)
+                llm_cache = get_llm_cache()
+
+                # Near-duplicates are answered from the stored original, no LLM call
+                original = find_duplicate(cleaned_input)
+                if original:
+                    result = dict(original, is_duplicate=True)
+                else:
+                    analysis = llm_cache.analyze_one(cleaned_input, analyze_feedback)
+                    result = save_to_mongodb(feedback, cleaned_input, analysis)
 
                 st.success("Analysis Complete ✅")
 
@@ -197,5 +210,11 @@ if st.button("Analyze Feedback"):
                 if result["is_duplicate"]:
                     st.warning("⚠️ Duplicate feedback detected. Not stored again.")
 
+                cache_stats = llm_cache.stats()
+                st.caption(
+                    f"Analysis cache: {cache_stats['memory_hits'] + cache_stats['mongo_hits']} hits / "
+                    f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+                )
+
             except Exception as e:
                 st.error(f"Error: {str(e)}")
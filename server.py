@@ -1,9 +1,33 @@
-from fastapi import FastAPI
+import os
+import csv
+import hmac
+import json
+from datetime import date
+from collections import Counter
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Header, Response, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from backend.feedback_service import process_feedback
+from pydantic import BaseModel, ValidationError, model_validator
+from backend.feedback_service import batch_scheduler
+from backend.async_feedback_service import process_feedback_once, process_feedback_chunk, startup
+from backend.idempotency import IdempotencyConflict, request_key
+from backend.db import feedbacks
+from backend.admin_queries import feedback_query
+from backend.export import EXPORT_FORMATS, export_feedbacks, export_filename
+from backend.reference_data import is_valid_location, district_of
+
+# Report exports are off unless a token is configured
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # ---------------- CORS ----------------
 app.add_middleware(
@@ -27,7 +51,216 @@ class FeedbackRequest(BaseModel):
     rating: int | None = None
     solution: str | None = None
 
+    @model_validator(mode="after")
+    def check_location(self):
+        if not is_valid_location(self.district, self.constituency):
+            actual = district_of(self.constituency)
+            raise ValueError(
+                f"constituency '{self.constituency}' is in {actual}, not {self.district}" if actual
+                else f"unknown constituency '{self.constituency}'"
+            )
+        return self
+
 # ---------------- API ENDPOINT ----------------
 @app.post("/api/feedback")
-def submit_feedback(req: FeedbackRequest):
-    return process_feedback(req.dict())
+async def submit_feedback(req: FeedbackRequest, response: Response,
+                          idempotency_key: str | None = Header(default=None, max_length=255)):
+    """
+    Retries are safe: send the same Idempotency-Key (or, without one, the
+    same body within a short window) and the original response comes back,
+    marked with an Idempotent-Replayed header, without storing it twice.
+    """
+    form_data = req.dict()
+    try:
+        result, replayed = await process_feedback_once(
+            form_data, request_key("feedback", form_data, idempotency_key)
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+# ---------------- BULK UPLOAD ----------------
+BULK_CHUNK_SIZE = 500       # rows validated + inserted per insert_many
+MAX_REPORTED_LINES = 1000   # per-line results kept for lines not stored cleanly
+MAX_LINE_BYTES = 64 * 1024  # longer lines (or CSV records) are reported, not buffered
+
+def decode_line(data):
+    try:
+        return data.decode("utf-8-sig").rstrip("\r"), None
+    except UnicodeDecodeError as e:
+        return None, f"not valid UTF-8 (byte {e.start})"
+
+async def iter_lines(byte_stream, max_line=MAX_LINE_BYTES):
+    """
+    Splits a streamed body into (text, error) lines, holding one chunk and
+    at most `max_line` bytes of the current line. A line that isn't UTF-8
+    or is too long comes back as (None, error) and the stream goes on.
+    """
+    too_long = f"line longer than {max_line} bytes"
+    buffer = bytearray()
+    overflow = False   # the current line is too long: drop its bytes up to the newline
+    async for chunk in byte_stream:
+        start = 0
+        while (end := chunk.find(b"\n", start)) >= 0:
+            if not overflow:
+                buffer += chunk[start:end]
+            if overflow or len(buffer) > max_line:
+                yield None, too_long
+            else:
+                yield decode_line(buffer)
+            buffer.clear()
+            overflow = False
+            start = end + 1
+        if not overflow:
+            buffer += chunk[start:]
+            if len(buffer) > max_line:
+                overflow = True
+                buffer.clear()
+    if overflow:
+        yield None, too_long
+    elif buffer:
+        yield decode_line(buffer)
+
+async def iter_records(lines, fmt):
+    """Yields (line_no, record, error) from NDJSON or CSV (text, error) lines."""
+    header, pending, start = None, None, 0
+    line_no = 0
+    async for line, error in lines:
+        line_no += 1
+        if error:
+            if pending is not None:
+                # The quoted field this line belonged to is lost with it
+                yield start, None, f"line {line_no} of the record: {error}"
+                pending = None
+            else:
+                yield line_no, None, error
+            continue
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"invalid JSON: {e.msg}"
+                continue
+            if isinstance(record, dict):
+                yield line_no, record, None
+            else:
+                yield line_no, None, "expected a JSON object"
+            continue
+
+        # CSV: a quoted field may span lines, keep reading until quotes balance
+        if pending is None:
+            if not line.strip():
+                continue
+            pending, start = line, line_no
+        else:
+            pending += "\n" + line
+        if pending.count('"') % 2:
+            if len(pending) > MAX_LINE_BYTES:
+                yield start, None, f"record longer than {MAX_LINE_BYTES} characters"
+                pending = None
+            continue
+        values, pending = next(csv.reader([pending])), None
+
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, {k: (v if v.strip() else None) for k, v in zip(header, values)}, None
+
+    if pending is not None:
+        yield start, None, "unterminated quoted field"
+
+@app.post("/api/feedback/bulk")
+async def submit_feedback_bulk(request: Request, format: str | None = None):
+    """
+    Streams an NDJSON (default) or CSV (text/csv or ?format=csv) upload.
+    Rows are validated against FeedbackRequest and stored in chunks, so
+    memory stays flat however large the file. Lines not listed under
+    "lines" were stored.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    counts = Counter()
+    reported = []
+    chunk = []
+
+    def report(line_no, status, **details):
+        counts[status] += 1
+        if status != "stored" and len(reported) < MAX_REPORTED_LINES:
+            reported.append({"line": line_no, "status": status, **details})
+
+    async def flush():
+        results = await process_feedback_chunk([row for _, row in chunk])
+        for (line_no, _), result in zip(chunk, results):
+            if result["status"] == "duplicate":
+                report(line_no, "duplicate", id=result["id"], duplicate_of=result["duplicate_of"])
+            elif result["status"] == "error":
+                report(line_no, "error", error=result["error"])
+            else:
+                report(line_no, "stored")
+        chunk.clear()
+
+    async for line_no, record, error in iter_records(iter_lines(request.stream()), fmt):
+        if error:
+            report(line_no, "invalid", error=error)
+            continue
+        try:
+            chunk.append((line_no, FeedbackRequest(**record).dict()))
+        except ValidationError as e:
+            report(line_no, "invalid", error="; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+                for err in e.errors()
+            ))
+            continue
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    return {
+        "format": fmt,
+        "received": sum(counts.values()),
+        "stored": counts["stored"],
+        "duplicates": counts["duplicate"],
+        "invalid": counts["invalid"],
+        "errors": counts["error"],
+        "lines": reported,
+        "lines_truncated": sum(counts.values()) - counts["stored"] > len(reported)
+    }
+
+# ---------------- REPORT EXPORT ----------------
+@app.get("/api/export/feedbacks")
+def export_feedback_report(format: str = "csv", district: list[str] | None = Query(default=None),
+                           category: str | None = None, start: date | None = None, end: date | None = None,
+                           authorization: str | None = Header(default=None)):
+    """
+    Analyzed feedbacks (optionally by district, category, date range) as
+    CSV, XLSX or Parquet, streamed from a Mongo cursor in chunks.
+    Requires "Authorization: Bearer $EXPORT_TOKEN".
+    """
+    if not EXPORT_TOKEN:
+        raise HTTPException(status_code=403, detail="Export is disabled (EXPORT_TOKEN not set)")
+    if not hmac.compare_digest((authorization or "").encode("utf-8"), f"Bearer {EXPORT_TOKEN}".encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid export token")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+    query = feedback_query(districts=district, category=category, start=start, end=end, analyzed=True)
+    try:
+        body = export_feedbacks(feedbacks, query, format)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format][1],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format)}"'}
+    )
+
+@app.get("/api/metrics/batches")
+def batch_metrics(window_hours: int = 24):
+    return batch_scheduler.metrics(window_hours)
@@ -0,0 +1,139 @@
+import os
+import signal
+import socket
+import argparse
+import threading
+import traceback
+
+from backend.feedback_service import (
+    job_queue, ANALYZE_BATCH_JOB, analyze_and_store_batch, mark_batch_failed, recover_stuck_batches,
+    flush_due_batches, ensure_indexes, rank_global_issues, seed_feedback_rollups
+)
+
+# ---------------- JOB HANDLERS ----------------
+HANDLERS = {
+    ANALYZE_BATCH_JOB: lambda payload: analyze_and_store_batch(payload["batch_id"]),
+}
+
+ON_GIVE_UP = {
+    ANALYZE_BATCH_JOB: lambda payload, error: mark_batch_failed(payload["batch_id"], error),
+}
+
+
+# --------------------------------------------------
+# Worker Loop
+# --------------------------------------------------
+class Heartbeat(threading.Thread):
+    """Keeps a job's lease alive while its handler runs."""
+
+    def __init__(self, job, worker_id):
+        super().__init__(daemon=True)
+        self.job = job
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        interval = job_queue.lease_seconds / 3
+        while not self.stopped.wait(interval):
+            try:
+                if not job_queue.heartbeat(self.job, self.worker_id):
+                    self.lost = True
+                    print(f"⚠️ {self.worker_id} lost the lease on job {self.job['_id']}")
+                    return
+            except Exception as e:
+                print(f"⚠️ Heartbeat failed for job {self.job['_id']}: {e}")
+
+def run_job(job, worker_id):
+    heartbeat = Heartbeat(job, worker_id)
+    heartbeat.start()
+    try:
+        HANDLERS[job["kind"]](job["payload"])
+    except Exception as e:
+        traceback.print_exc()
+        if not heartbeat.lost and job_queue.fail(job, worker_id, e) == "failed":
+            ON_GIVE_UP.get(job["kind"], lambda *_: None)(job["payload"], e)
+        return
+    finally:
+        heartbeat.stopped.set()
+
+    if not heartbeat.lost:
+        job_queue.complete(job, worker_id)
+
+def worker_loop(worker_id, stop, poll_seconds, drain):
+    while not stop.is_set():
+        try:
+            job = job_queue.claim(worker_id, kinds=HANDLERS)
+        except Exception as e:
+            print(f"⚠️ {worker_id} could not claim a job: {e}")
+            stop.wait(poll_seconds)
+            continue
+
+        if job is None:
+            if drain:
+                return
+            stop.wait(poll_seconds)
+            continue
+
+        print(f"🔧 {worker_id} picked up {job['kind']} (attempt {job['attempts']})")
+        run_job(job, worker_id)
+
+def reaper_loop(stop, interval):
+    while not stop.wait(interval):
+        for job in job_queue.reap():
+            ON_GIVE_UP.get(job["kind"], lambda *_: None)(job["payload"], job["last_error"])
+
+
+def flush_loop(stop, interval):
+    """Age/SLO flushes; safe to run in every worker process (closing is atomic)."""
+    while not stop.wait(interval):
+        try:
+            flushed = flush_due_batches()
+            if flushed:
+                print(f"⏱️ Flushed {flushed} batches on age/SLO")
+        except Exception as e:
+            print(f"⚠️ Batch flush failed: {e}")
+
+
+def main(args):
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    failures = ensure_indexes()
+    if failures:
+        print(f"⚠️ Indexes missing on {', '.join(failures)} (see above); queries on them will scan")
+    recovered = recover_stuck_batches()
+    if recovered:
+        print(f"♻️ Re-queued {recovered} unfinished batches")
+    ranked = rank_global_issues()
+    if ranked:
+        print(f"🏷️ Ranked {ranked} global issues")
+    seeded = seed_feedback_rollups()
+    if seeded:
+        print(f"📊 Seeded {seeded} rollup counters")
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=worker_loop, args=(f"{prefix}:{i}", stop, args.poll, args.drain))
+        for i in range(args.workers)
+    ]
+    threading.Thread(target=reaper_loop, args=(stop, job_queue.lease_seconds), daemon=True).start()
+    threading.Thread(target=flush_loop, args=(stop, args.flush_interval), daemon=True).start()
+
+    print(f"👷 {args.workers} analysis workers running ({prefix})")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"👋 Workers stopped. Jobs: {job_queue.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background batch analysis workers")
+    parser.add_argument("-w", "--workers", type=int, default=int(os.getenv("ANALYSIS_WORKERS", "4")))
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between polls when idle")
+    parser.add_argument("--flush-interval", type=float, default=float(os.getenv("BATCH_FLUSH_INTERVAL", "5")),
+                        help="seconds between age/SLO flush checks")
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    main(parser.parse_args())